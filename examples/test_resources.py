@@ -12,38 +12,35 @@ from pathlib import Path
 import asyncio
 import sys
 
-# Add src to path for local testing
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-
-from protein_hunter_mcp.server import (
-    EXAMPLE_PDL1_SEQUENCE,
-    EXAMPLE_PDL1_SHORT_SEQUENCE,
-    EXAMPLE_MULTIMER_SEQUENCE,
-    EXAMPLE_RNA_SEQUENCE,
-    EXAMPLE_LIGAND_SAM,
-    EXAMPLE_LIGAND_SMILES,
-    EXAMPLE_GENERIC_TARGET,
+try:
+    import protein_hunter_mcp  # noqa: F401
+except ImportError:
+    # Not installed (e.g. running from a fresh checkout): add src to path for local testing
+    sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+# Resources shown by test_resource_constants, as (label, example name) pairs
+RESOURCES = (
+    ("Example 1: PDL1 Sequence", "pdl1"),
+    ("Example 2: PDL1 Short", "pdl1_short"),
+    ("Example 4: Multimer Sequence", "multimer"),
+    ("Example 6: RNA Sequence", "rna"),
+    ("Example 5: SAM Ligand", "ligand_sam"),
+    ("Chai: Ligand SMILES", "ligand_smiles"),
+    ("Chai: Generic Target", "generic_target"),
 )
 
 
 def test_resource_constants():
     """Test that all resource constants are accessible."""
+    from protein_hunter_mcp.server import get_example
+    
     print("Testing Protein Sequence Resources\n")
     print("=" * 80)
     
-    resources = [
-        ("Example 1: PDL1 Sequence", EXAMPLE_PDL1_SEQUENCE),
-        ("Example 2: PDL1 Short", EXAMPLE_PDL1_SHORT_SEQUENCE),
-        ("Example 4: Multimer Sequence", EXAMPLE_MULTIMER_SEQUENCE),
-        ("Example 6: RNA Sequence", EXAMPLE_RNA_SEQUENCE),
-        ("Example 5: SAM Ligand", EXAMPLE_LIGAND_SAM),
-        ("Chai: Ligand SMILES", EXAMPLE_LIGAND_SMILES),
-        ("Chai: Generic Target", EXAMPLE_GENERIC_TARGET),
-    ]
-    
-    for name, sequence in resources:
+    for name, example in RESOURCES:
+        sequence = get_example(example)
         seq_len = len(sequence)
-        preview = sequence[:50] + "..." if len(sequence) > 50 else sequence
+        preview = f"{sequence[:50]}..." if seq_len > 50 else sequence
         print(f"\n{name}:")
         print(f"  Length: {seq_len}")
         print(f"  Preview: {preview}")
@@ -4,89 +4,256 @@ Post-installation script for Protein Hunter MCP.
 
 Run this after `uv sync`:
     uv run postinstall.py
+
+Individual steps can be skipped, e.g. `uv run postinstall.py --skip-pyrosetta`
+(see `--help`). Heavy packages are only imported by the steps that need them.
 """
 
+import argparse
+import hashlib
+import importlib
+import json
+import mmap
 import os
+import queue
+import re
+import shutil
 import subprocess
 import sys
-import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import requests
+
+# Written into the Boltz cache after a successful weight download; bump the
+# suffix whenever the expected weight set changes to force a re-download
+BOLTZ_WEIGHTS_MARKER = ".boltz2_downloaded.v1"
+
+# Number of LigandMPNN weight files fetched concurrently
+DOWNLOAD_WORKERS = 8
+
+# Ask for the file bytes as stored: the body is copied from the raw stream
+# without content decoding, and sizes are compared against Content-Length
+IDENTITY_ENCODING = {"Accept-Encoding": "identity"}
+
+# Matches `pip` at the start of a shell command or after `&&` / `;`
+_SHELL_PIP_RE = re.compile(r"(^|&&\s*|;\s*)pip\s+")
+
+# Serializes progress output from download worker threads
+_print_lock = threading.Lock()
+
+
+# Screen rows for per-download progress bars, one per download worker
+_bar_positions: "queue.Queue[int]" = queue.Queue()
+for _position in range(DOWNLOAD_WORKERS):
+    _bar_positions.put(_position)
+
+
+def _log(message: str) -> None:
+    """Print a progress message without interleaving output across threads."""
+    with _print_lock:
+        try:
+            from tqdm import tqdm
+            tqdm.write(message)
+        except ImportError:
+            print(message, flush=True)
+
+
+def copy_with_progress(src: Any, dst: Any, total: int | None, initial: int, desc: str) -> None:
+    """Copy a response stream to a file, showing a byte progress bar if tqdm is available."""
+    try:
+        from tqdm import tqdm
+    except ImportError:
+        shutil.copyfileobj(src, dst, length=1 << 20)
+        return
+    
+    position = _bar_positions.get()
+    try:
+        with tqdm(
+            total=total,
+            initial=initial,
+            unit="B",
+            unit_scale=True,
+            unit_divisor=1024,
+            desc=desc,
+            position=position,
+            leave=False,
+        ) as bar:
+            while chunk := src.read(1 << 20):
+                dst.write(chunk)
+                bar.update(len(chunk))
+    finally:
+        _bar_positions.put(position)
 
 
-def create_pip_wrapper() -> Path:
+def to_uv_pip(command: str | list[str]) -> str | list[str]:
     """
-    Create a temporary pip wrapper that redirects to uv pip.
+    Rewrite a pip invocation so it runs through ``uv pip`` instead.
     
-    Returns:
-        Path to the temporary directory containing the wrapper.
+    Handles both the shell strings used by pyrosetta_installer (including
+    ``cd ... && pip install .`` chains) and argv lists such as
+    ``["pip", ...]`` or ``[sys.executable, "-m", "pip", ...]``.
     """
-    print("🔧 Creating pip wrapper for uv...")
-    wrapper_dir = Path(tempfile.mkdtemp(prefix="uv_pip_wrapper_"))
-    pip_wrapper = wrapper_dir / "pip"
-    
-    # Create a wrapper script that calls uv pip
-    pip_wrapper.write_text(
-        """#!/bin/bash
-exec uv pip "$@"
-""",
-        encoding="utf-8",
-    )
-    pip_wrapper.chmod(0o755)
+    if isinstance(command, str):
+        return _SHELL_PIP_RE.sub(r"\1uv pip ", command)
+    argv = list(command)
+    if argv[:1] == ["pip"]:
+        return ["uv", "pip", *argv[1:]]
+    if argv[1:3] == ["-m", "pip"]:
+        return ["uv", "pip", *argv[3:]]
+    return argv
+
+
+class _UvPipSubprocess:
+    """Stand-in for the ``subprocess`` module that routes pip calls to uv pip."""
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(subprocess, name)
     
-    print(f"✅ Created pip wrapper at {pip_wrapper}")
-    return wrapper_dir
+    def Popen(self, args: Any, *pargs: Any, **kwargs: Any) -> subprocess.Popen:
+        return subprocess.Popen(to_uv_pip(args), *pargs, **kwargs)
+    
+    def run(self, args: Any, *pargs: Any, **kwargs: Any) -> subprocess.CompletedProcess:
+        return subprocess.run(to_uv_pip(args), *pargs, **kwargs)
+    
+    def call(self, args: Any, *pargs: Any, **kwargs: Any) -> int:
+        return subprocess.call(to_uv_pip(args), *pargs, **kwargs)
+    
+    def check_call(self, args: Any, *pargs: Any, **kwargs: Any) -> int:
+        return subprocess.check_call(to_uv_pip(args), *pargs, **kwargs)
+    
+    def check_output(self, args: Any, *pargs: Any, **kwargs: Any) -> Any:
+        return subprocess.check_output(to_uv_pip(args), *pargs, **kwargs)
 
 
 def install_pyrosetta() -> None:
-    """Install PyRosetta using the pip wrapper to redirect to uv pip."""
+    """Install PyRosetta with its pip calls redirected to uv pip."""
     print("\n⏳ Installing PyRosetta (this may take a while)...")
     
-    wrapper_dir = create_pip_wrapper()
-    old_path = os.environ.get("PATH", "")
-    
-    # Prepend wrapper directory to PATH
-    os.environ["PATH"] = f"{wrapper_dir}:{old_path}"
+    import pyrosetta_installer
     
+    # Only the installer's own module global is swapped, so the rest of the
+    # process (and other postinstall threads) keep the real subprocess module
+    original_subprocess = pyrosetta_installer.subprocess
+    pyrosetta_installer.subprocess = _UvPipSubprocess()
     try:
-        import pyrosetta_installer
         pyrosetta_installer.install_pyrosetta()
         print("✅ PyRosetta installed successfully!")
     except Exception as e:
         print(f"❌ Error installing PyRosetta: {e}")
         sys.exit(1)
     finally:
-        # Restore original PATH
-        os.environ["PATH"] = old_path
-        # Clean up wrapper directory
-        try:
-            for file in wrapper_dir.iterdir():
-                file.unlink()
-            wrapper_dir.rmdir()
-        except Exception as e:
-            print(f"⚠️  Warning: Could not clean up wrapper directory: {e}")
+        pyrosetta_installer.subprocess = original_subprocess
 
 
 def download_boltz_weights() -> None:
-    """Download Boltz weights and dependencies."""
+    """Download Boltz weights and dependencies unless a previous run already did."""
+    from importlib.metadata import version, PackageNotFoundError
+    
+    cache = Path.home() / ".boltz"
+    marker = cache / BOLTZ_WEIGHTS_MARKER
+    try:
+        boltz_version = version("boltz")
+    except PackageNotFoundError:
+        boltz_version = "unknown"
+    
+    if marker.exists() and marker.read_text(encoding="utf-8").strip() == boltz_version:
+        print("\n✓ Boltz weights already present")
+        return
+    
     print("\n⬇️  Downloading Boltz weights and dependencies...")
     
     try:
         from boltz.main import download_boltz2
         
-        cache = Path.home() / ".boltz"
         cache.mkdir(parents=True, exist_ok=True)
         download_boltz2(cache)
+        marker.write_text(boltz_version, encoding="utf-8")
         print("✅ Boltz weights downloaded successfully!")
     except Exception as e:
         print(f"❌ Error downloading Boltz weights: {e}")
         sys.exit(1)
 
 
-def download_file(url: str, output_path: Path) -> None:
-    """Download a file from URL to output_path."""
-    import urllib.request
+def create_download_session() -> "requests.Session":
+    """
+    Create an HTTP session whose connection pool is shared by all download workers.
     
-    urllib.request.urlretrieve(url, output_path)
+    Returns:
+        Session reusing keep-alive TCP/TLS connections per host.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=DOWNLOAD_WORKERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def sha256_file(path: Path) -> str:
+    """Hash a file in one call over a read-only memory map."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha256(mm).hexdigest()
+
+
+def remote_size(url: str, session: "requests.Session") -> int | None:
+    """Return the Content-Length advertised for url, or None if unknown."""
+    response = session.head(url, allow_redirects=True, headers=IDENTITY_ENCODING)
+    response.raise_for_status()
+    length = response.headers.get("Content-Length")
+    return int(length) if length is not None else None
+
+
+def download_file(url: str, output_path: Path, session: "requests.Session") -> int | None:
+    """
+    Stream a file from URL to output_path over a pooled session.
+    
+    The body is written to a sibling ``.part`` file which is renamed into place
+    only after the full Content-Length has been received, so an interrupted run
+    never leaves a truncated file under the final name. A ``.part`` file left by
+    an earlier run is resumed with an HTTP Range request; if the server ignores
+    the range and sends the whole body, the partial file is overwritten.
+    
+    Returns:
+        The file size checked against Content-Length, or None if the server sent
+        no Content-Length (the download could not be checked for truncation).
+    """
+    tmp_path = output_path.with_suffix(output_path.suffix + ".part")
+    offset = tmp_path.stat().st_size if tmp_path.exists() else 0
+    headers = dict(IDENTITY_ENCODING)
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+    
+    with session.get(url, stream=True, headers=headers) as response:
+        if offset and response.status_code == 416:
+            # Range not satisfiable: the partial file is unusable, start over
+            tmp_path.unlink()
+            return download_file(url, output_path, session)
+        response.raise_for_status()
+        
+        resumed = offset > 0 and response.status_code == 206
+        if not resumed:
+            offset = 0
+        content_length = response.headers.get("Content-Length")
+        expected_size = offset + int(content_length) if content_length is not None else None
+        
+        with open(tmp_path, "ab" if resumed else "wb") as f:
+            copy_with_progress(response.raw, f, expected_size, offset, output_path.name)
+    
+    if expected_size is not None and tmp_path.stat().st_size != expected_size:
+        raise IOError(
+            f"Incomplete download of {url}: got {tmp_path.stat().st_size} of {expected_size} bytes"
+        )
+    os.replace(tmp_path, output_path)
+    return expected_size
 
 
 def setup_ligandmpnn() -> None:
@@ -128,17 +295,90 @@ def setup_ligandmpnn() -> None:
         "ligandmpnn_sc_v_32_002_16.pt",
     ]
     
-    print(f"  Downloading {len(models)} model files...")
+    # There are no published digests for these files, so a digest is recorded,
+    # with the file's size and mtime, after the first download, and only once the
+    # file's size matched the server's Content-Length. Later runs skip files whose
+    # size and mtime are unchanged and re-hash the ones that changed. This catches
+    # files changed after install, not a corrupt download of the right length.
+    checksums_path = model_params_dir / "sha256.json"
+    checksums: dict[str, Any] = (
+        json.loads(checksums_path.read_text(encoding="utf-8")) if checksums_path.exists() else {}
+    )
+    checksums_lock = threading.Lock()
+    
+    # One directory scan instead of a stat() per model file; only files with a
+    # recorded digest need their size and mtime (a stat() each on Linux)
+    present: set[str] = set()
+    recorded_stats: dict[str, os.stat_result] = {}
+    with os.scandir(model_params_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                present.add(entry.name)
+                if entry.name in checksums:
+                    recorded_stats[entry.name] = entry.stat()
+    
+    def record(model_file: str, digest: str) -> None:
+        stat = (model_params_dir / model_file).stat()
+        with checksums_lock:
+            checksums[model_file] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    
+    def fetch(model_file: str) -> None:
+        url = f"{base_url}/{model_file}"
+        output_path = model_params_dir / model_file
+        expected = checksums.get(model_file)
+        if isinstance(expected, str):
+            # Written by an older postinstall: digest only
+            expected = {"sha256": expected}
+        
+        if model_file in present:
+            if expected is not None:
+                stat = recorded_stats[model_file]
+                if expected.get("size") == stat.st_size and expected.get("mtime_ns") == stat.st_mtime_ns:
+                    _log(f"    ⏭️  {model_file} (already exists, unchanged since verified)")
+                    return
+                digest = sha256_file(output_path)
+                if digest == expected["sha256"]:
+                    record(model_file, digest)
+                    _log(f"    ⏭️  {model_file} (already exists, checksum OK)")
+                    return
+                _log(f"    ⚠️  {model_file} checksum mismatch, re-downloading")
+                output_path.unlink()
+            else:
+                # Not verified yet: trust the file only if it has the remote size
+                expected_size = remote_size(url, session)
+                if expected_size is None:
+                    _log(f"    ⏭️  {model_file} (already exists, remote size unknown: not verified)")
+                    return
+                if output_path.stat().st_size == expected_size:
+                    record(model_file, sha256_file(output_path))
+                    _log(f"    ⏭️  {model_file} (already exists)")
+                    return
+                _log(f"    ⚠️  {model_file} size differs from the server's, re-downloading")
+        
+        _log(f"    ⬇️  {model_file}...")
+        if download_file(url, output_path, session) is None:
+            _log(f"    ⚠️  {model_file} (no Content-Length from the server: not verified)")
+            return
+        record(model_file, sha256_file(output_path))
+        _log(f"    ✅ {model_file}")
+    
+    print(f"  Checking {len(models)} model files...")
     try:
-        for model_file in models:
-            output_path = model_params_dir / model_file
-            if output_path.exists():
-                print(f"    ⏭️  {model_file} (already exists)")
-                continue
-            
-            url = f"{base_url}/{model_file}"
-            print(f"    ⬇️  {model_file}...")
-            download_file(url, output_path)
+        session = create_download_session()
+        try:
+            with session, ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+                futures = [executor.submit(fetch, model_file) for model_file in models]
+                try:
+                    for future in as_completed(futures):
+                        # Re-raise the first download failure
+                        future.result()
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            # Keep digests of every file that did complete, even if another one failed
+            checksums_path.write_text(json.dumps(checksums, indent=2, sort_keys=True), encoding="utf-8")
         
         print("✅ LigandMPNN model parameters downloaded!")
     except Exception as e:
@@ -150,10 +390,16 @@ def setup_dalphaball() -> None:
     """Make DAlphaBall.gcc executable."""
     dalphaball_path = Path("Protein-Hunter/utils/DAlphaBall.gcc")
     
-    if not dalphaball_path.exists():
+    try:
+        mode = dalphaball_path.stat().st_mode
+    except FileNotFoundError:
         print("\n⚠️  DAlphaBall.gcc not found, skipping...")
         return
     
+    if mode & 0o111 == 0o111:
+        print("\n✓ DAlphaBall.gcc is already executable")
+        return
+    
     print("\n🔧 Making DAlphaBall.gcc executable...")
     
     try:
@@ -165,7 +411,13 @@ def setup_dalphaball() -> None:
 
 
 def verify_installations() -> None:
-    """Verify that key packages are importable."""
+    """
+    Verify that key packages are importable.
+    
+    Set PH_PARALLEL_VERIFY=1 to import the packages from a thread pool. This
+    is off by default because first-time torch imports are not thread-safe
+    in every version.
+    """
     print("\n🔍 Verifying installations...")
     
     packages = [
@@ -175,37 +427,79 @@ def verify_installations() -> None:
     ]
     
     failed = []
-    for package in packages:
+    failed_lock = threading.Lock()
+    
+    def check(package: str) -> None:
         try:
-            __import__(package)
-            print(f"  ✅ {package}")
+            importlib.import_module(package)
+            _log(f"  ✅ {package}")
         except ImportError:
-            print(f"  ❌ {package} (import failed)")
-            failed.append(package)
+            _log(f"  ❌ {package} (import failed)")
+            with failed_lock:
+                failed.append(package)
+    
+    if os.environ.get("PH_PARALLEL_VERIFY") == "1":
+        with ThreadPoolExecutor(max_workers=len(packages)) as executor:
+            for future in as_completed([executor.submit(check, package) for package in packages]):
+                future.result()
+    else:
+        for package in packages:
+            check(package)
     
     if failed:
         print(f"\n⚠️  Warning: Some packages failed to import: {', '.join(failed)}")
         print("    This may be expected for some optional components.")
 
 
-def main() -> None:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command-line flags for selecting which post-installation steps to run."""
+    parser = argparse.ArgumentParser(description="Post-installation setup for Protein Hunter MCP.")
+    parser.add_argument("--skip-boltz", action="store_true", help="Skip downloading Boltz weights")
+    parser.add_argument("--skip-pyrosetta", action="store_true", help="Skip installing PyRosetta")
+    parser.add_argument(
+        "--skip-ligandmpnn",
+        action="store_true",
+        help=(
+            "Skip downloading LigandMPNN weights. Downloads are checked against their "
+            "Content-Length; the SHA-256 digests recorded in model_params/sha256.json only "
+            "detect files that change after the first install, not a bad first download"
+        ),
+    )
+    parser.add_argument("--skip-dalphaball", action="store_true", help="Skip making DAlphaBall.gcc executable")
+    parser.add_argument("--skip-verify", action="store_true", help="Skip verifying package imports")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
     """Run all post-installation steps."""
+    args = parse_args(argv)
     print("🚀 Running Protein Hunter MCP post-installation...\n")
     
-    # Step 1: Download Boltz weights
-    download_boltz_weights()
-    
-    # Step 2: Install PyRosetta with pip wrapper
-    install_pyrosetta()
-    
-    # Step 3: Setup LigandMPNN (if available)
-    setup_ligandmpnn()
+    # Steps 1-3 are network-bound and independent of each other, so run them concurrently:
+    # Boltz weights, PyRosetta (via uv pip) and LigandMPNN weights (if available)
+    network_steps = [
+        step
+        for step, skipped in (
+            (download_boltz_weights, args.skip_boltz),
+            (install_pyrosetta, args.skip_pyrosetta),
+            (setup_ligandmpnn, args.skip_ligandmpnn),
+        )
+        if not skipped
+    ]
+    if network_steps:
+        with ThreadPoolExecutor(max_workers=len(network_steps)) as executor:
+            futures = [executor.submit(step) for step in network_steps]
+            # Propagate failures (including sys.exit from a step) in submission order
+            for future in futures:
+                future.result()
     
     # Step 4: Make DAlphaBall.gcc executable
-    setup_dalphaball()
+    if not args.skip_dalphaball:
+        setup_dalphaball()
     
     # Step 5: Verify installations
-    verify_installations()
+    if not args.skip_verify:
+        verify_installations()
     
     print("\n🎉 Post-installation complete!")
     print("\n📝 Next steps:")
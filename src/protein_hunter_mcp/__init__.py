@@ -3,10 +3,10 @@
 
 from importlib.metadata import version, PackageNotFoundError
 
+# Looked up once here; the rest of the package imports __version__ from this module
 try:
     __version__ = version("protein-hunter-mcp")
 except PackageNotFoundError:
     __version__ = "unknown"
 
 __all__ = ["__version__"]
-
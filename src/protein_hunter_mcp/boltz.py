@@ -1,23 +1,205 @@
-
-
-from typing import Optional, Any
+from typing import Optional, Any, Awaitable, Callable, TypedDict
+from functools import cache
 from pathlib import Path
 
 import asyncio
 import csv
+import hashlib
+import itertools
+import json
+import os
+import re
+import sys
 from fastmcp import Context
 
-from protein_hunter_mcp.shared_lock import get_design_lock
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # optional: install the "fast" extra for typed, vectorized CSV parsing
+    pa = None
+    pacsv = None
+
+from protein_hunter_mcp.design_worker import WorkerPool, WorkerError
+from protein_hunter_mcp.progress import ProgressReporter, TailBuffer, iter_line_blocks, pump, terminate_process_group
+from protein_hunter_mcp.shared_lock import design_slot, set_max_concurrent_per_gpu
+
+# Modules a persistent Boltz worker imports once at start-up
+BOLTZ_WORKER_PRELOAD = ("torch", "boltz")
+
+# _run_boltz_design arguments that don't change what a job produces
+_UNHASHED_PARAMS = frozenset({"self", "ctx", "gpu_ids", "return_arrow", "max_results", "force"})
+
+# Written into a run's output directory once it has completed successfully
+JOB_COMPLETE_MARKER = ".completed"
+
+# MCP resource serving the full summary CSV of a run (results link to it as results_uri)
+SUMMARY_URI_TEMPLATE = "boltz://results/{name}/summary"
+
+# design.py progress line: "--- Run N, Cycle C ---"
+_RE_CYCLE = re.compile(rb"--- Run\s+(\d+)[^\n]*?Cycle\s+(\d+)")
+
+# pyarrow.csv's default null and boolean spellings, so the csv module fallback
+# types summary columns the same way
+_CSV_NULLS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "N/A", "NA", "NULL", "NaN", "n/a", "nan", "null",
+})
+_CSV_TRUE = frozenset({"1", "True", "TRUE", "true"})
+_CSV_FALSE = frozenset({"0", "False", "FALSE", "false"})
+_RE_CSV_INT = re.compile(r"[+-]?\d+")
+
+
+class TargetSpec(TypedDict, total=False):
+    """One target of design_binder_batch; keys mirror design_protein_advanced."""
+    target_id: str
+    name: str
+    num_designs: int
+    num_cycles: int
+    protein_seqs: str
+    protein_ids: str
+    protein_msas: str
+    template_path: str
+    template_chain_id: str
+    template_cif_chain_id: str
+    contact_residues: str
+    add_constraints: bool
+    ligand_ccd: str
+    ligand_id: str
+    nucleic_seq: str
+    nucleic_type: str
+    nucleic_id: str
+    min_design_protein_length: int
+    max_design_protein_length: int
+    high_iptm_threshold: float
+    percent_X: int
+    cyclic: bool
+    use_msa_for_af3: bool
+    plot: bool
+    use_bf16: bool
+    force: bool
+
+
+@cache
+def detect_gpu_ids() -> list[int]:
+    """Return the IDs of all visible CUDA devices (probed once per process).
+    
+    Returns:
+        list: GPU IDs, or [0] if torch is unavailable or reports no devices
+    """
+    try:
+        import torch
+        count = torch.cuda.device_count()
+    except Exception:
+        count = 0
+    return list(range(count)) or [0]
 
 
 class BoltzTools:
-    def __init__(self, gpu_id: int = 0):
+    def __init__(
+        self,
+        gpu_id: int = 0,
+        persistent_workers: bool = False,
+        gpu_ids: Optional[list[int]] = None,
+        use_bf16: bool = False,
+        max_concurrent_per_gpu: Optional[int] = None,
+        prepare_features: bool = False,
+    ):
         """Initialize BoltzTools with GPU configuration.
         
         Args:
             gpu_id: GPU device ID to use for all operations
+            persistent_workers: Run designs in a long-lived worker process per GPU
+                instead of a fresh interpreter per call (falls back to a fresh
+                process if the worker cannot start)
+            gpu_ids: GPUs to shard multi-design runs across (default: [gpu_id])
+            use_bf16: Run Boltz inference under bfloat16 autocast by default
+            max_concurrent_per_gpu: Design processes allowed on one GPU at a time,
+                shared with Chai (each needs ~20 GB of VRAM); None leaves the
+                process-wide limit as configured (see shared_lock)
+            prepare_features: Build target features (MSA, templates) in a CPU-only
+                design.py --prepare_features_only run before queueing for a GPU, and
+                cache them by target so later designs skip that work
         """
         self.gpu_id = gpu_id
+        self.gpu_ids = list(gpu_ids) if gpu_ids else [gpu_id]
+        # Rotates which GPU takes the first shard, so single-design calls spread out
+        self._gpu_cycle = itertools.cycle(range(len(self.gpu_ids)))
+        self.persistent_workers = persistent_workers
+        self.use_bf16 = use_bf16
+        self.prepare_features = prepare_features
+        self._feature_tasks: dict[str, asyncio.Task] = {}
+        # Targets whose feature preparation failed; their designs skip the stage
+        self._feature_failures: set[str] = set()
+        
+        # Resolve the Protein-Hunter checkout once; design calls only check the cached flag
+        self._ph_dir = Path(__file__).resolve().parents[2] / "Protein-Hunter"
+        self._design_py = self._ph_dir / "boltz_ph" / "design.py"
+        # Same interpreter as the persistent workers, so both paths see the same packages
+        self._cmd_prefix = [sys.executable, str(self._design_py)]
+        self._available = self._design_py.is_file()
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._worker_pool: Optional[WorkerPool] = None
+        if max_concurrent_per_gpu is not None:
+            self.set_max_concurrent_per_gpu(max_concurrent_per_gpu)
+    
+    @property
+    def available(self) -> bool:
+        """Whether the Protein-Hunter Boltz design script is installed."""
+        return self._available
+    
+    def read_run_summary(self, name: str) -> str:
+        """Full summary CSV of a completed Boltz design run.
+        
+        Args:
+            name: Run directory name under results_boltz ("{name}__{key}")
+        
+        Returns:
+            str: The summary CSV as text
+        """
+        if Path(name).name != name or name in ("", ".", ".."):
+            raise ValueError(f"Invalid Boltz run name: {name}")
+        output_dir = self._ph_dir / "results_boltz" / name
+        summary_csv = _find_summary_csv(output_dir)
+        if not (output_dir / JOB_COMPLETE_MARKER).exists() or not summary_csv.is_file():
+            raise FileNotFoundError(f"No completed summary found for Boltz run {name}")
+        return summary_csv.read_text()
+    
+    async def warmup(self) -> None:
+        """Import torch and boltz once in a throwaway process.
+        
+        This pulls their modules and shared libraries into the OS page cache, so
+        the first real design starts faster. Safe to call repeatedly; failures are
+        ignored since the design itself will report any real problem.
+        """
+        if not self._available:
+            return
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self._run_warmup())
+        await asyncio.shield(self._warmup_task)
+    
+    async def _run_warmup(self) -> None:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-c", "import torch, boltz",
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+                cwd=str(self._ph_dir)
+            )
+            await process.wait()
+        except OSError:
+            pass
+    
+    def set_max_concurrent_per_gpu(self, max_concurrent_per_gpu: int) -> None:
+        """Set how many design processes (Boltz and Chai) may share one GPU.
+        
+        The limit is process-wide. Raise it only when the GPU has room for several
+        model copies; a GPU with designs in flight keeps its old limit until they finish.
+        
+        Args:
+            max_concurrent_per_gpu: Design processes allowed on one GPU at a time
+        """
+        set_max_concurrent_per_gpu(max_concurrent_per_gpu)
+    
     async def design_protein_binder(
         self,
         target_protein_sequence: str,
@@ -47,10 +229,10 @@ class BoltzTools:
         return await self._run_boltz_design(
             num_designs=num_designs,
             num_cycles=num_cycles,
-            gpu_id=self.gpu_id,
             name=design_name,
             protein_seqs=target_protein_sequence,
             protein_ids="B",
+            use_bf16=self.use_bf16,
             ctx=ctx,
         )
     
@@ -85,13 +267,13 @@ class BoltzTools:
         return await self._run_boltz_design(
             num_designs=num_designs,
             num_cycles=num_cycles,
-            gpu_id=self.gpu_id,
             name=design_name,
             protein_seqs=target_protein_sequence,
             protein_ids="B",
             template_path=template_pdb_code,
             template_chain_id=template_chain_id,
             template_cif_chain_id=template_cif_chain_id,
+            use_bf16=self.use_bf16,
             ctx=ctx,
         )
     
@@ -122,12 +304,12 @@ class BoltzTools:
         return await self._run_boltz_design(
             num_designs=num_designs,
             num_cycles=num_cycles,
-            gpu_id=self.gpu_id,
             name=design_name,
             protein_seqs=target_protein_sequence,
             protein_ids="B",
             contact_residues=contact_residues,
             add_constraints=True,
+            use_bf16=self.use_bf16,
             ctx=ctx,
         )
     
@@ -158,10 +340,10 @@ class BoltzTools:
         return await self._run_boltz_design(
             num_designs=num_designs,
             num_cycles=num_cycles,
-            gpu_id=self.gpu_id,
             name=design_name,
             protein_seqs=target_protein_sequences,
             protein_ids=protein_chain_ids,
+            use_bf16=self.use_bf16,
             ctx=ctx,
         )
     
@@ -190,7 +372,6 @@ class BoltzTools:
         return await self._run_boltz_design(
             num_designs=num_designs,
             num_cycles=num_cycles,
-            gpu_id=self.gpu_id,
             name=design_name,
             protein_seqs=target_protein_sequence,
             protein_ids="B",
@@ -198,6 +379,7 @@ class BoltzTools:
             max_design_protein_length=20,
             high_iptm_threshold=0.8,
             cyclic=True,
+            use_bf16=self.use_bf16,
             ctx=ctx,
         )
     
@@ -228,12 +410,12 @@ class BoltzTools:
         return await self._run_boltz_design(
             num_designs=num_designs,
             num_cycles=num_cycles,
-            gpu_id=self.gpu_id,
             name=design_name,
             ligand_ccd=ligand_ccd_code,
             ligand_id=ligand_chain_id,
             min_design_protein_length=130,
             max_design_protein_length=150,
+            use_bf16=self.use_bf16,
             ctx=ctx,
         )
     
@@ -266,13 +448,13 @@ class BoltzTools:
         return await self._run_boltz_design(
             num_designs=num_designs,
             num_cycles=num_cycles,
-            gpu_id=self.gpu_id,
             name=design_name,
             nucleic_seq=nucleic_acid_sequence,
             nucleic_type=nucleic_acid_type,
             nucleic_id=nucleic_chain_id,
             min_design_protein_length=130,
             max_design_protein_length=150,
+            use_bf16=self.use_bf16,
             ctx=ctx,
         )
     
@@ -307,13 +489,13 @@ class BoltzTools:
         return await self._run_boltz_design(
             num_designs=num_designs,
             num_cycles=num_cycles,
-            gpu_id=self.gpu_id,
             name=design_name,
             protein_seqs=target_protein_sequence,
             protein_ids=protein_chain_id,
             ligand_ccd=ligand_ccd_code,
             ligand_id=ligand_chain_id,
             high_iptm_threshold=0.8,
+            use_bf16=self.use_bf16,
             ctx=ctx,
         )
     
@@ -349,6 +531,9 @@ class BoltzTools:
         # Validation and output parameters
         use_msa_for_af3: bool = True,
         plot: bool = True,
+        use_bf16: Optional[bool] = None,
+        max_results: Optional[int] = None,
+        force: bool = False,
         ctx: Context = None,
     ) -> dict[str, Any]:
         """Advanced Boltz design with full parameter control.
@@ -381,6 +566,11 @@ class BoltzTools:
             cyclic: Enable cyclic peptide design (default: False)
             use_msa_for_af3: Use MSA for AlphaFold3 validation (default: True)
             plot: Generate plots for design cycles (default: True)
+            use_bf16: Run inference under bfloat16 autocast, roughly halving activation
+                memory (default: the server setting)
+            max_results: Return at most this many result rows; the full table stays
+                available at "results_uri" (default: all rows)
+            force: Run even if an identical job already completed (default: False)
         
         Returns:
             dict: Results with summary CSV contents and status
@@ -388,7 +578,6 @@ class BoltzTools:
         return await self._run_boltz_design(
             num_designs=num_designs,
             num_cycles=num_cycles,
-            gpu_id=self.gpu_id,
             name=name,
             protein_seqs=protein_seqs,
             protein_ids=protein_ids,
@@ -410,15 +599,67 @@ class BoltzTools:
             cyclic=cyclic,
             use_msa_for_af3=use_msa_for_af3,
             plot=plot,
+            use_bf16=self.use_bf16 if use_bf16 is None else use_bf16,
+            max_results=max_results,
+            force=force,
             ctx=ctx,
         )
     
+    async def design_binder_batch(
+        self,
+        targets: list[TargetSpec],
+        ctx: Context = None,
+    ) -> list[dict[str, Any]]:
+        """Design binders for several targets in one call.
+        
+        Each target runs as its own design (targets are not colon-joined into one
+        design.py call, which would make them a single multimer target). With
+        persistent workers the Boltz start-up cost is paid once per GPU for the
+        whole batch, and with feature preparation every target's MSA/template work
+        runs up front on CPU while earlier targets use the GPU.
+        
+        Args:
+            targets: Per-target parameters; keys match design_protein_advanced, plus
+                an optional "target_id" (default: the target's position in the list)
+        
+        Returns:
+            list: One result dict per target, in order, each with a "target_id" key;
+                every result row is tagged with the same "target_id"
+        """
+        total = len(targets)
+        completed = 0
+        if ctx:
+            await ctx.report_progress(progress=0, total=total)
+        
+        async def run_target(index: int, spec: TargetSpec) -> dict[str, Any]:
+            nonlocal completed
+            params = dict(spec)
+            target_id = str(params.pop("target_id", index))
+            params.setdefault("name", f"batch_{target_id}")
+            params.setdefault("num_designs", 1)
+            params.setdefault("num_cycles", 7)
+            params.setdefault("use_bf16", self.use_bf16)
+            
+            result = await self._run_boltz_design(**params)
+            result["target_id"] = target_id
+            for row in result.get("results", []):
+                row["target_id"] = target_id
+            
+            completed += 1
+            if ctx:
+                await ctx.report_progress(progress=completed, total=total)
+            return result
+        
+        return list(await asyncio.gather(*[
+            run_target(index, spec) for index, spec in enumerate(targets)
+        ]))
+    
     async def _run_boltz_design(
         self,
         num_designs: int,
         num_cycles: int,
-        gpu_id: int,
         name: str,
+        gpu_ids: Optional[list[int]] = None,
         # Optional protein target parameters
         protein_seqs: Optional[str] = None,
         protein_ids: str = "B",
@@ -446,47 +687,72 @@ class BoltzTools:
         # Validation and output parameters
         use_msa_for_af3: bool = True,
         plot: bool = True,
+        use_bf16: bool = False,
+        return_arrow: bool = False,
+        max_results: Optional[int] = None,
+        force: bool = False,
         ctx: Context = None,
     ) -> dict[str, Any]:
         """Internal method to run Boltz protein design with all optional parameters.
         
         This is the least common denominator for all Boltz design tools. It handles
         all possible parameter combinations for different design scenarios.
+        
+        When more than one GPU is configured, the designs are split into one shard
+        per GPU, run concurrently, and their summary CSVs are merged.
+        
+        With return_arrow, "results" is a pyarrow.Table (when pyarrow is installed)
+        so internal callers can filter and rank without building per-row dicts.
+        
+        Jobs are keyed by a hash of their arguments and written to
+        results_boltz/{name}__{key}/; repeating a completed job returns its stored
+        results instead of running it again, unless force is set.
+        
+        max_results caps the rows returned inline; "results_uri" always points at
+        the full summary CSV.
         """
-        lock = get_design_lock()
+        # Must run first, while locals() holds only the arguments
+        job_params = {k: v for k, v in locals().items() if k not in _UNHASHED_PARAMS}
+        key = hashlib.sha256(
+            json.dumps(job_params, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+        run_name = f"{name}__{key}"
+        output_dir = self._ph_dir / "results_boltz" / run_name
         
-        # Wait for the lock with periodic progress updates
-        total_steps = num_designs * num_cycles
-        wait_interval = 2.0  # Report waiting status every 2 seconds
+        if not self._available:
+            return {
+                "status": "error",
+                "error": f"Protein-Hunter design script not found at {self._design_py}. Please ensure it's properly installed."
+            }
         
-        while lock.locked():
-            if ctx:
-                await ctx.report_progress(progress=0, total=total_steps)
-            try:
-                await asyncio.wait_for(lock.acquire(), timeout=wait_interval)
-                break
-            except asyncio.TimeoutError:
-                continue
-        else:
-            # Lock wasn't locked, acquire it now
-            await lock.acquire()
+        # Reuse the results of an identical job that already completed
+        if not force and (output_dir / JOB_COMPLETE_MARKER).exists():
+            summary_csv = _find_summary_csv(output_dir)
+            if summary_csv.exists():
+                return _completed_result(
+                    summary_csv, output_dir, key, return_arrow, max_results, cached=True
+                )
+        
+        # Prepare target features on CPU before queueing for a GPU, so MSA and
+        # template work overlaps with other designs' inference
+        features_pkl = None
+        if self.prepare_features and protein_seqs:
+            features_pkl = await self._prepare_features(
+                protein_seqs=protein_seqs,
+                protein_ids=protein_ids,
+                protein_msas=protein_msas,
+                template_path=template_path,
+                template_chain_id=template_chain_id,
+                template_cif_chain_id=template_cif_chain_id,
+            )
+        
+        total_steps = num_designs * num_cycles
         
         try:
-            # Find the Protein-Hunter directory
-            protein_hunter_dir = Path(__file__).parent.parent.parent / "Protein-Hunter"
-            if not protein_hunter_dir.exists():
-                return {
-                    "status": "error",
-                    "error": f"Protein-Hunter directory not found at {protein_hunter_dir}. Please ensure it's properly installed."
-                }
-            
-            # Build the command with required parameters
-            cmd = [
-                "python", str(protein_hunter_dir / "boltz_ph" / "design.py"),
-                "--num_designs", str(num_designs),
+            # Build the arguments shared by every shard; each shard adds
+            # --num_designs, --gpu_id and --name
+            args = [
                 "--num_cycles", str(num_cycles),
-                "--gpu_id", str(gpu_id),
-                "--name", name,
                 "--min_design_protein_length", str(min_design_protein_length),
                 "--max_design_protein_length", str(max_design_protein_length),
                 "--high_iptm_threshold", str(high_iptm_threshold),
@@ -495,155 +761,469 @@ class BoltzTools:
             
             # Add optional protein parameters
             if protein_seqs:
-                cmd.extend(["--protein_seqs", protein_seqs])
-                cmd.extend(["--protein_ids", protein_ids])
-                cmd.extend(["--protein_msas", protein_msas])
+                args.extend(["--protein_seqs", protein_seqs])
+                args.extend(["--protein_ids", protein_ids])
+                if features_pkl:
+                    args.extend(["--features_pkl", str(features_pkl)])
+                else:
+                    args.extend(["--protein_msas", protein_msas])
             
             # Add optional template parameters
             if template_path:
-                cmd.extend(["--template_path", template_path])
+                args.extend(["--template_path", template_path])
                 if template_chain_id:
-                    cmd.extend(["--template_chain_id", template_chain_id])
+                    args.extend(["--template_chain_id", template_chain_id])
                 if template_cif_chain_id:
-                    cmd.extend(["--template_cif_chain_id", template_cif_chain_id])
+                    args.extend(["--template_cif_chain_id", template_cif_chain_id])
             
             # Add optional contact specification parameters
             if contact_residues:
-                cmd.extend(["--contact_residues", contact_residues])
+                args.extend(["--contact_residues", contact_residues])
                 if add_constraints:
-                    cmd.append("--add_constraints")
+                    args.append("--add_constraints")
             
             # Add optional ligand parameters
             if ligand_ccd:
-                cmd.extend(["--ligand_ccd", ligand_ccd])
+                args.extend(["--ligand_ccd", ligand_ccd])
                 if ligand_id:
-                    cmd.extend(["--ligand_id", ligand_id])
+                    args.extend(["--ligand_id", ligand_id])
             
             # Add optional nucleic acid parameters
             if nucleic_seq:
-                cmd.extend(["--nucleic_seq", nucleic_seq])
+                args.extend(["--nucleic_seq", nucleic_seq])
                 if nucleic_type:
-                    cmd.extend(["--nucleic_type", nucleic_type])
+                    args.extend(["--nucleic_type", nucleic_type])
                 if nucleic_id:
-                    cmd.extend(["--nucleic_id", nucleic_id])
+                    args.extend(["--nucleic_id", nucleic_id])
             
             # Add boolean flags
             if cyclic:
-                cmd.append("--cyclic")
+                args.append("--cyclic")
             if use_msa_for_af3:
-                cmd.append("--use_msa_for_af3")
+                args.append("--use_msa_for_af3")
             if plot:
-                cmd.append("--plot")
+                args.append("--plot")
+            if use_bf16:
+                args.append("--use_cuda_bfloat16")
             
             # Report initial progress
-            total_steps = num_designs * num_cycles
-            if ctx:
-                await ctx.report_progress(progress=0, total=total_steps)
+            reporter = ProgressReporter(ctx, total_steps)
+            await reporter.report(0)
             
-            # Run the design process
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=str(protein_hunter_dir)
-            )
+            if gpu_ids is None:
+                start = next(self._gpu_cycle)
+                gpu_ids = self.gpu_ids[start:] + self.gpu_ids[:start]
+            shards = _split_designs(num_designs, gpu_ids)
+            shard_progress = [0] * len(shards)
             
-            # Track progress by reading output
-            current_run = 0
-            current_cycle = 0
+            # A rerun overwrites the stored results, so they stop counting as
+            # completed until the whole run succeeds again
+            (output_dir / JOB_COMPLETE_MARKER).unlink(missing_ok=True)
             
-            # Read stdout line by line to track progress
-            while True:
-                line = await process.stdout.readline()
-                if not line:
-                    break
-                    
-                line_str = line.decode().strip()
-                
-                # Parse progress from output patterns
-                if "=== Starting Design Run" in line_str:
-                    parts = line_str.split("Run")
-                    if len(parts) > 1:
-                        run_info = parts[1].strip().split("/")[0].strip()
-                        try:
-                            current_run = int(run_info)
-                        except ValueError:
-                            pass
-                
-                elif "--- Run" in line_str and "Cycle" in line_str:
-                    try:
-                        parts = line_str.replace("---", "").strip().split(",")
-                        run_part = parts[0].strip().split()[-1]
-                        cycle_part = parts[1].strip().split()[-1]
-                        current_run = int(run_part)
-                        current_cycle = int(cycle_part)
-                        
-                        progress = current_run * num_cycles + current_cycle
-                        if ctx:
-                            await ctx.report_progress(
-                                progress=min(progress, total_steps),
-                                total=total_steps
-                            )
-                    except (ValueError, IndexError):
-                        pass
+            async def report_shard_progress(index: int, progress: int) -> None:
+                shard_progress[index] = progress
+                await reporter.report(sum(shard_progress))
             
-            # Wait for process to complete
-            await process.wait()
+            async def report_waiting() -> None:
+                # Keep the client informed while a shard waits for its GPU
+                if ctx:
+                    await ctx.report_progress(progress=sum(shard_progress), total=total_steps)
             
-            # Report 100% completion
-            if ctx:
-                await ctx.report_progress(progress=total_steps, total=total_steps)
+            outcomes = await asyncio.gather(*[
+                self._launch_shard(
+                    [
+                        "--num_designs", str(count),
+                        "--gpu_id", str(shard_gpu_id),
+                        "--name", f"{run_name}{name_suffix}",
+                        *args,
+                    ],
+                    shard_gpu_id,
+                    num_cycles,
+                    lambda progress, index=index: report_shard_progress(index, progress),
+                    report_waiting,
+                )
+                for index, (shard_gpu_id, count, name_suffix) in enumerate(shards)
+            ])
             
-            if process.returncode != 0:
-                stderr = await process.stderr.read()
-                return {
-                    "status": "error",
-                    "error": f"Design process failed with return code {process.returncode}",
-                    "stderr": stderr.decode()
-                }
+            # Report 100% completion
+            await reporter.finish()
             
-            # Find the summary CSV file (primary output)
-            output_dir = protein_hunter_dir / "results_boltz" / name
-            summary_csv = output_dir / "summary_high_iptm.csv"
+            for returncode, stderr in outcomes:
+                if returncode != 0:
+                    return {
+                        "status": "error",
+                        "error": f"Design process failed with return code {returncode}",
+                        "stderr": stderr
+                    }
             
-            # Fall back to summary_all_runs.csv if high_iptm CSV doesn't exist
-            # (happens when no cycles met the high-ipTM threshold)
-            if not summary_csv.exists():
-                summary_csv = output_dir / "summary_all_runs.csv"
+            # Find the summary CSV file of each shard (primary output)
+            summary_csvs = []
+            for shard_gpu_id, _, name_suffix in shards:
+                summary_csv = _find_summary_csv(self._ph_dir / "results_boltz" / f"{run_name}{name_suffix}")
+                if not summary_csv.exists():
+                    return {
+                        "status": "error",
+                        "error": f"Summary CSV not found at {summary_csv}. Design may have failed."
+                    }
+                summary_csvs.append((shard_gpu_id, summary_csv))
             
-            if not summary_csv.exists():
-                return {
-                    "status": "error",
-                    "error": f"Summary CSV not found at {summary_csv}. Design may have failed."
-                }
+            if len(summary_csvs) == 1:
+                summary_csv = summary_csvs[0][1]
+            else:
+                summary_csv = _merge_summary_csvs(summary_csvs, output_dir)
+            (output_dir / JOB_COMPLETE_MARKER).touch()
             
-            # Read CSV contents for LLM-friendly results
-            try:
-                with open(summary_csv, 'r') as f:
-                    reader = csv.DictReader(f)
-                    results = list(reader)
-                
-                return {
-                    "status": "completed",
-                    "summary_csv_path": str(summary_csv),
-                    "output_dir": str(output_dir),
-                    "num_results": len(results),
-                    "results": results
-                }
-            except Exception as e:
-                return {
-                    "status": "error",
-                    "error": f"Failed to read CSV: {str(e)}",
-                    "summary_csv_path": str(summary_csv)
-                }
+            return _completed_result(summary_csv, output_dir, key, return_arrow, max_results)
             
         except Exception as e:
             return {
                 "status": "error",
                 "error": str(e)
             }
-        finally:
-            # Always release the lock
-            lock.release()
+    
+    async def _prepare_features(
+        self,
+        protein_seqs: str,
+        protein_ids: str,
+        protein_msas: str,
+        template_path: Optional[str],
+        template_chain_id: Optional[str],
+        template_cif_chain_id: Optional[str],
+    ) -> Optional[Path]:
+        """Return cached target features, computing them on CPU on a cache miss.
+        
+        Features are keyed by the target sequences, MSAs and template, so every
+        design tool called on the same target reuses them. Concurrent calls for the
+        same target share a single preparation run, and a target whose preparation
+        failed is not prepared again.
+        
+        Returns:
+            Path: Pickled features, or None if they could not be prepared (the
+                design then runs the full pipeline itself)
+        """
+        feature_args = [
+            "--protein_seqs", protein_seqs,
+            "--protein_ids", protein_ids,
+            "--protein_msas", protein_msas,
+        ]
+        if template_path:
+            feature_args.extend(["--template_path", template_path])
+            if template_chain_id:
+                feature_args.extend(["--template_chain_id", template_chain_id])
+            if template_cif_chain_id:
+                feature_args.extend(["--template_cif_chain_id", template_cif_chain_id])
+        key = hashlib.sha256(json.dumps(feature_args).encode()).hexdigest()
+        
+        features_pkl = self._ph_dir / "cache" / "features" / f"{key}.pkl"
+        if features_pkl.exists():
+            return features_pkl
+        if key in self._feature_failures:
+            return None
+        
+        task = self._feature_tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                _run_feature_preparation(self._cmd_prefix, self._ph_dir, features_pkl, feature_args)
+            )
+            self._feature_tasks[key] = task
+            
+            def forget(task: asyncio.Task) -> None:
+                self._feature_tasks.pop(key, None)
+                if not task.cancelled() and (task.exception() is not None or task.result() is None):
+                    self._feature_failures.add(key)
+            
+            task.add_done_callback(forget)
+        return await asyncio.shield(task)
+    
+    async def _launch_shard(
+        self,
+        args: list[str],
+        gpu_id: int,
+        num_cycles: int,
+        on_progress: Callable[[int], Awaitable[None]],
+        on_wait: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> tuple[int, str]:
+        """Run design.py for one shard and stream its progress.
+        
+        Args:
+            args: Arguments for design.py
+            gpu_id: GPU the shard runs on
+            num_cycles: Cycles per design, used to turn run/cycle lines into steps
+            on_progress: Called with the shard's completed step count
+            on_wait: Called periodically while waiting for a free slot on the GPU
+        
+        Returns:
+            tuple: (return code, stderr)
+        """
+        # Track progress by reading output
+        reported = None
+        
+        async def handle_output(block: bytes) -> None:
+            nonlocal reported
+            
+            # Only the last cycle line of a block matters, and only if it moved on
+            matches = _RE_CYCLE.findall(block)
+            if matches:
+                latest = (int(matches[-1][0]), int(matches[-1][1]))
+                if latest != reported:
+                    reported = latest
+                    await on_progress(latest[0] * num_cycles + latest[1])
+        
+        # Never run more designs on one GPU than fit in its memory
+        async with design_slot(gpu_id, on_wait):
+            worker = None
+            if self.persistent_workers:
+                if self._worker_pool is None:
+                    self._worker_pool = WorkerPool(self._design_py, self._ph_dir, preload=BOLTZ_WORKER_PRELOAD)
+                worker = await self._worker_pool.get(gpu_id)
+            
+            if worker is not None:
+                # Run the design in the persistent worker
+                try:
+                    return await worker.submit(args, handle_output)
+                except WorkerError:
+                    # The worker crashed; rerun the design in a fresh process instead
+                    self._worker_pool.mark_failed(gpu_id)
+            
+            # Run the design process
+            process = await asyncio.create_subprocess_exec(
+                *self._cmd_prefix, *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=os.fspath(self._ph_dir),
+                close_fds=True,
+                # Own process group, so the design and its children can be signalled together
+                start_new_session=True,
+            )
+            
+            # Read stdout in large chunks to track progress, draining stderr at the
+            # same time so a verbose run can't stall on a full stderr pipe
+            async def read_stdout() -> None:
+                async for block in iter_line_blocks(process.stdout):
+                    await handle_output(block)
+            
+            stderr_tail = TailBuffer()
+            try:
+                await asyncio.gather(read_stdout(), pump(process.stderr, stderr_tail.append))
+                
+                # Wait for process to complete
+                await process.wait()
+            except asyncio.CancelledError:
+                # Don't leave an orphaned design holding GPU memory
+                await terminate_process_group(process)
+                raise
+            stderr = stderr_tail.text() if process.returncode != 0 else ""
+            return process.returncode, stderr
+
+
+async def _run_feature_preparation(
+    cmd_prefix: list[str],
+    cwd: Path,
+    features_pkl: Path,
+    feature_args: list[str],
+) -> Optional[Path]:
+    """Run design.py --prepare_features_only with no GPU visible.
+    
+    Args:
+        cmd_prefix: Interpreter and design.py path
+        cwd: Protein-Hunter checkout to run in
+        features_pkl: Where to store the pickled features
+        feature_args: Target arguments (sequences, MSAs, templates)
+    
+    Returns:
+        Path: features_pkl once written, or None if preparation failed (including
+            an unwritable cache directory)
+    """
+    part_path = features_pkl.with_name(f"{features_pkl.name}.{os.getpid()}.part")
+    try:
+        features_pkl.parent.mkdir(parents=True, exist_ok=True)
+        process = await asyncio.create_subprocess_exec(
+            *cmd_prefix,
+            "--prepare_features_only",
+            "--features_pkl", str(part_path),
+            "--name", f"features_{features_pkl.stem[:16]}",
+            *feature_args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+            cwd=str(cwd),
+            env={**os.environ, "CUDA_VISIBLE_DEVICES": ""},
+        )
+        await process.wait()
+        if process.returncode != 0 or not part_path.exists():
+            return None
+        os.replace(part_path, features_pkl)
+        return features_pkl
+    except OSError:
+        # Unwritable feature cache or design.py could not be started
+        return None
+    finally:
+        # exists() rather than missing_ok: the cache path may not be a directory at all
+        if part_path.exists():
+            part_path.unlink()
 
 
+def _split_designs(num_designs: int, gpu_ids: list[int]) -> list[tuple[int, int, str]]:
+    """Split designs into one shard per GPU.
+    
+    Args:
+        num_designs: Total number of designs requested
+        gpu_ids: GPUs available for the run
+    
+    Returns:
+        list: (gpu_id, number of designs, run name suffix) per shard. A single
+            shard keeps the plain run name so its output directory is unchanged.
+    """
+    num_shards = max(1, min(num_designs, len(gpu_ids)))
+    if num_shards == 1:
+        return [(gpu_ids[0], num_designs, "")]
+    base, extra = divmod(num_designs, num_shards)
+    return [
+        (gpu_id, base + (1 if i < extra else 0), f"__gpu{gpu_id}")
+        for i, gpu_id in enumerate(gpu_ids[:num_shards])
+    ]
+
+
+def _find_summary_csv(output_dir: Path) -> Path:
+    """Return the summary CSV of a finished run.
+    
+    Falls back to summary_all_runs.csv when summary_high_iptm.csv doesn't exist
+    (happens when no cycles met the high-ipTM threshold).
+    """
+    summary_csv = output_dir / "summary_high_iptm.csv"
+    if not summary_csv.exists():
+        summary_csv = output_dir / "summary_all_runs.csv"
+    return summary_csv
+
+
+def _completed_result(
+    summary_csv: Path,
+    output_dir: Path,
+    key: str,
+    return_arrow: bool = False,
+    max_results: Optional[int] = None,
+    cached: bool = False,
+) -> dict[str, Any]:
+    """Build the result of a completed design from its summary CSV.
+    
+    Args:
+        summary_csv: Summary CSV of the run
+        output_dir: Output directory of the run
+        key: Job key (hash of the design arguments)
+        return_arrow: Return results as a pyarrow.Table
+        max_results: Return at most this many rows inline (num_results still
+            counts all of them)
+        cached: Whether the results come from an earlier identical job
+    
+    Returns:
+        dict: Results with summary CSV contents and status
+    """
+    # Read CSV contents for LLM-friendly results
+    try:
+        results = _read_summary_csv(summary_csv, return_arrow=return_arrow)
+        num_results = len(results)
+        if max_results is not None and num_results > max_results:
+            results = results.slice(0, max_results) if return_arrow and pa is not None else results[:max_results]
+    except Exception as e:
+        return {
+            "status": "error",
+            "error": f"Failed to read CSV: {str(e)}",
+            "summary_csv_path": str(summary_csv)
+        }
+    return {
+        "status": "completed",
+        "key": key,
+        "cached": cached,
+        "summary_csv_path": str(summary_csv),
+        "results_uri": SUMMARY_URI_TEMPLATE.format(name=output_dir.name),
+        "output_dir": str(output_dir),
+        "num_results": num_results,
+        "results": results
+    }
+
+
+def _read_summary_csv(summary_csv: Path, return_arrow: bool = False) -> Any:
+    """Read a summary CSV.
+    
+    Uses pyarrow's vectorized parser over a memory map of the file when pyarrow is
+    installed; otherwise falls back to csv.DictReader. Both type numeric columns
+    (iPTM, pLDDT, ...) as numbers, so rows are the same either way.
+    
+    Args:
+        summary_csv: Path to the CSV file
+        return_arrow: Return the pyarrow.Table itself instead of a list of rows
+    
+    Returns:
+        list or pyarrow.Table: One dict per row, or the table
+    """
+    if pacsv is not None:
+        with pa.memory_map(str(summary_csv)) as source:
+            table = pacsv.read_csv(source)
+        return table if return_arrow else table.to_pylist()
+    with open(summary_csv, 'r', newline='') as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    columns = {
+        name: _convert_csv_column([row.get(name) or "" for row in rows])
+        for name in reader.fieldnames or []
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def _convert_csv_column(values: list[str]) -> list[Any]:
+    """Type one CSV column the way pyarrow.csv infers it.
+    
+    The column becomes int, bool or float if every non-null value parses as one
+    (tried in that order, nulls become None), and stays text otherwise.
+    """
+    present = [value for value in values if value not in _CSV_NULLS]
+    if not present:
+        return [None] * len(values)
+    if all(_RE_CSV_INT.fullmatch(value) for value in present):
+        convert = int
+    elif all(value in _CSV_TRUE or value in _CSV_FALSE for value in present):
+        convert = _CSV_TRUE.__contains__
+    else:
+        try:
+            for value in present:
+                float(value)
+        except ValueError:
+            return values
+        convert = float
+    return [None if value in _CSV_NULLS else convert(value) for value in values]
+
+
+def _merge_summary_csvs(
+    summary_csvs: list[tuple[int, Path]],
+    output_dir: Path,
+) -> Path:
+    """Concatenate shard summary CSVs, tagging each row with the GPU that produced it.
+    
+    Args:
+        summary_csvs: (gpu_id, summary CSV path) per shard
+        output_dir: Directory the merged CSV is written to
+    
+    Returns:
+        Path: The merged CSV
+    """
+    results = []
+    fieldnames = ["gpu_id"]
+    for gpu_id, summary_csv in summary_csvs:
+        with open(summary_csv, 'r') as f:
+            reader = csv.DictReader(f)
+            for field in reader.fieldnames or []:
+                if field not in fieldnames:
+                    fieldnames.append(field)
+            for row in reader:
+                results.append({"gpu_id": str(gpu_id), **row})
+    
+    # Keep the file name of the shard outputs (high-ipTM unless every shard fell back)
+    merged_name = summary_csvs[0][1].name
+    if any(path.name == "summary_high_iptm.csv" for _, path in summary_csvs):
+        merged_name = "summary_high_iptm.csv"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    merged_csv = output_dir / merged_name
+    with open(merged_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval="")
+        writer.writeheader()
+        writer.writerows(results)
+    return merged_csv
@@ -1,21 +1,183 @@
-from typing import Optional, Any
+from typing import Optional, Any, TypedDict
 from pathlib import Path
 
 import asyncio
+import hashlib
+import itertools
 import json
+import os
+import re
+import shlex
+import sys
+from collections import Counter
 from fastmcp import Context
 
-from protein_hunter_mcp.shared_lock import get_design_lock
+try:
+    import orjson
+except ImportError:  # optional: install the "fast" extra for faster metrics.json parsing
+    orjson = None
+
+from protein_hunter_mcp.design_worker import WorkerPool, WorkerError
+from protein_hunter_mcp.progress import ProgressReporter, TailBuffer, iter_line_blocks, pump, terminate_process_group
+from protein_hunter_mcp.shared_lock import design_slot
+
+# Modules a persistent Chai worker imports once at start-up
+CHAI_WORKER_PRELOAD = ("torch", "chai_lab")
+
+# design.py progress line: "./results_chai/{jobname}/run_X | Step Y: ..." (the run
+# number must sit right before "| Step", since the job name may contain "run_" too)
+_RE_STEP = re.compile(rb"run_(\d+)\s*\|\s*Step\s+(\d+)")
+
+# Run directory names inside a job's output directory
+_RE_RUN_NAME = re.compile(r"run_\d+")
+
+# Digit runs in file names, compared as numbers so cycle_10 sorts after cycle_9
+_RE_DIGITS = re.compile(r"(\d+)")
+
+# A protein target: one-letter residues (X for unknown), chains optionally split by ":"
+_RE_PROTEIN = re.compile(r"[ACDEFGHIKLMNPQRSTVWYX:]+")
+
+# Heavy atoms of a SMILES string: bracket atoms, two-letter halogens, organic-subset atoms
+_RE_SMILES_ATOM = re.compile(r"\[[^\]]+\]|Cl|Br|[BCNOPSFI]|[bcnops]")
+
+# MCP resource serving the full metrics.json of a run (results link to it as metrics_uri)
+METRICS_URI_TEMPLATE = "chai://results/{jobname}/{run}/metrics"
+
+# (_run_chai_design argument, design.py flag) pairs passed as bare switches
+_BOOL_FLAGS = (
+    ("cyclic", "--cyclic"),
+    ("repredict", "--repredict"),
+    ("scale_temp_by_plddt", "--scale_temp_by_plddt"),
+    ("use_msa_for_af3", "--use_msa_for_af3"),
+    ("plot", "--plot"),
+)
+
+# Design lengths are rounded up to one of these when pad_to_bucket is on, so the
+# model only ever compiles a handful of shapes
+LENGTH_BUCKETS = (64, 128, 192, 256, 384, 512, 768, 1024, 1536, 2048)
+
+# Compiler cache locations under Protein-Hunter/cache/, so successive design
+# processes reuse compiled JAX/XLA, TorchInductor and Triton kernels
+_COMPILE_CACHE_DIRS = {
+    "JAX_COMPILATION_CACHE_DIR": "jax",
+    "TORCH_INDUCTOR_CACHE_DIR": "inductor",
+    "TRITON_CACHE_DIR": "triton",
+}
+_XLA_FLAGS = "--xla_gpu_enable_triton_gemm=true --xla_gpu_autotune_level=4"
+
+# Rough GPU seconds per (diffusion step x token^2) of one design cycle, calibrated so
+# a 120-residue binder for a 120-residue target at 200 steps and 5 cycles comes to
+# ~7.5 minutes on an H100
+_GPU_SECONDS_PER_STEP_TOKEN2 = 7.8e-6
+
+# Written into a job's output directory, holding the job key, once it has completed
+JOB_COMPLETE_MARKER = ".completed"
+
+# Minimum seconds between Chai progress reports (diffusion steps print quickly)
+CHAI_PROGRESS_MIN_INTERVAL = 0.2
+
+
+class ChaiJobSpec(TypedDict, total=False):
+    """One job of design_batch_chai; keys mirror design_protein_advanced_chai."""
+    jobname: str
+    length: int
+    percent_X: int
+    seq: str
+    target_seq: str
+    n_trials: int
+    n_cycles: int
+    cyclic: bool
+    n_recycles: int
+    n_diff_steps: int
+    hysteresis_mode: str
+    repredict: bool
+    omit_aa: str
+    bias_aa: str
+    temperature: float
+    scale_temp_by_plddt: bool
+    render_freq: int
+    use_msa_for_af3: bool
+    plot: bool
+    force: bool
+    dry_run: bool
 
 
 class ChaiTools:
-    def __init__(self, gpu_id: int = 0):
+    def __init__(
+        self,
+        gpu_id: int = 0,
+        persistent_workers: bool = False,
+        gpu_ids: Optional[list[int]] = None,
+        pad_to_bucket: bool = False,
+    ):
         """Initialize ChaiTools with GPU configuration.
         
         Args:
             gpu_id: GPU device ID to use for all operations
+            persistent_workers: Run designs in a long-lived worker process per GPU
+                instead of a fresh interpreter per call (falls back to a fresh
+                process if the worker cannot start)
+            gpu_ids: GPUs to spread designs across, round-robin (default: [gpu_id])
+            pad_to_bucket: Round design lengths up to the next of LENGTH_BUCKETS and
+                pass the requested one as design.py --original_length, so compiled
+                kernels are reused across lengths (design.py trims the padding)
         """
         self.gpu_id = gpu_id
+        self.gpu_ids = list(gpu_ids) if gpu_ids else [gpu_id]
+        self._gpu_cycle = itertools.cycle(self.gpu_ids)
+        self.persistent_workers = persistent_workers
+        self.pad_to_bucket = pad_to_bucket
+        self._worker_pool: Optional[WorkerPool] = None
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._inflight_waiters: Counter[str] = Counter()
+        
+        # Resolve the Protein-Hunter checkout once; design calls only check the cached flag
+        self._ph_dir = Path(__file__).resolve().parents[2] / "Protein-Hunter"
+        self._design_py = self._ph_dir / "chai_ph" / "design.py"
+        # Same interpreter as the persistent workers, so both paths see the same packages
+        self._cmd_prefix = [sys.executable, str(self._design_py)]
+        self._results_chai = self._ph_dir / "results_chai"
+        self._outputs = self._ph_dir / "outputs"
+        self._available = self._design_py.is_file()
+        self._env = self._compile_cache_env()
+    
+    def _compile_cache_env(self) -> dict[str, str]:
+        """Environment for design processes with persistent compiler caches enabled.
+        
+        Variables already set in the server's environment take precedence.
+        """
+        env = os.environ.copy()
+        for var, subdir in _COMPILE_CACHE_DIRS.items():
+            cache_dir = self._ph_dir / "cache" / subdir
+            if self._available:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+            env.setdefault(var, str(cache_dir))
+        env.setdefault("XLA_FLAGS", _XLA_FLAGS)
+        return env
+    
+    @property
+    def available(self) -> bool:
+        """Whether the Protein-Hunter Chai design script is installed."""
+        return self._available
+    
+    def read_run_metrics(self, jobname: str, run: str) -> str:
+        """Full metrics.json of one run of a Chai design job (per-step values included).
+        
+        Args:
+            jobname: Name of the design job
+            run: Run directory name, e.g. "run_0"
+        
+        Returns:
+            str: The metrics file as JSON text
+        """
+        if Path(jobname).name != jobname or jobname in ("", ".", "..") or not _RE_RUN_NAME.fullmatch(run):
+            raise ValueError(f"Invalid Chai job or run name: {jobname}/{run}")
+        for root in (self._results_chai, self._outputs):
+            metrics_file = root / jobname / run / "metrics.json"
+            if metrics_file.is_file():
+                return metrics_file.read_text()
+        raise FileNotFoundError(f"No metrics found for Chai run {jobname}/{run}")
+    
     async def design_unconditional_protein(
         self,
         design_name: str = "unconditional_design",
@@ -23,12 +185,16 @@ class ChaiTools:
         percent_X: int = 0,
         n_trials: int = 1,
         n_cycles: int = 5,
+        dry_run: bool = False,
         ctx: Context = None,
     ) -> dict[str, Any]:
         """Design de novo proteins of a desired length (Chai Example 1: unconditional design).
         
         Generate unconditional proteins without a specific target.
         Long-running task: 5-10 minutes per design on an H100 GPU.
+        Diffusion steps (50 + target_length, kept within 100-300) and trunk recycles
+        (3, or 2 above 500 residues) follow target_length; set them explicitly with
+        design_protein_advanced_chai.
         
         Args:
             design_name: Name for this design run (default: "unconditional_design")
@@ -36,6 +202,7 @@ class ChaiTools:
             percent_X: Percentage of X (unknown) residues (default: 0)
             n_trials: Number of design trials to generate (default: 1)
             n_cycles: Number of design cycles (default: 5, recommended: 5-7)
+            dry_run: Return the design.py command and a rough GPU-time estimate without running it (default: False)
         
         Returns:
             dict: Results with output directory contents and status
@@ -52,7 +219,7 @@ class ChaiTools:
             target_seq="ACDEFGHIKLMNPQRSTVWY",
             n_trials=n_trials,
             n_cycles=n_cycles,
-            gpu_id=self.gpu_id,
+            dry_run=dry_run,
             ctx=ctx,
         )
     
@@ -64,12 +231,16 @@ class ChaiTools:
         percent_X: int = 80,
         n_trials: int = 1,
         n_cycles: int = 5,
+        dry_run: bool = False,
         ctx: Context = None,
     ) -> dict[str, Any]:
         """Design a protein binder for a target protein using Chai (Example 2: protein binder).
         
         Designs a protein that binds to a specific target protein sequence.
         Long-running task: 5-10 minutes per design on an H100 GPU.
+        Diffusion steps (50 + target_length, kept within 100-300) and trunk recycles
+        (3, or 2 above 500 residues) follow target_length; set them explicitly with
+        design_protein_advanced_chai.
         
         Args:
             target_protein_sequence: Target protein sequence to design a binder for
@@ -78,6 +249,7 @@ class ChaiTools:
             percent_X: Percentage of X residues for diversity (default: 80)
             n_trials: Number of design trials to generate (default: 1)
             n_cycles: Number of design cycles (default: 5)
+            dry_run: Return the design.py command and a rough GPU-time estimate without running it (default: False)
         
         Returns:
             dict: Results with output directory contents and status
@@ -94,8 +266,8 @@ class ChaiTools:
             target_seq=target_protein_sequence,
             n_trials=n_trials,
             n_cycles=n_cycles,
-            gpu_id=self.gpu_id,
             use_msa_for_af3=True,
+            dry_run=dry_run,
             ctx=ctx,
         )
     
@@ -107,12 +279,16 @@ class ChaiTools:
         percent_X: int = 80,
         n_trials: int = 1,
         n_cycles: int = 5,
+        dry_run: bool = False,
         ctx: Context = None,
     ) -> dict[str, Any]:
         """Design a cyclic peptide binder for a target protein using Chai (Example 3: cyclic peptide).
         
         Designs short cyclic peptides that bind to target proteins.
         Long-running task: 5-10 minutes per design on an H100 GPU.
+        Diffusion steps (50 + target_length, kept within 100-300) and trunk recycles
+        (3, or 2 above 500 residues) follow target_length; set them explicitly with
+        design_protein_advanced_chai.
         
         Args:
             target_protein_sequence: Target protein sequence
@@ -121,6 +297,7 @@ class ChaiTools:
             percent_X: Percentage of X residues (default: 80)
             n_trials: Number of design trials to generate (default: 1)
             n_cycles: Number of design cycles (default: 5)
+            dry_run: Return the design.py command and a rough GPU-time estimate without running it (default: False)
         
         Returns:
             dict: Results with output directory contents and status
@@ -134,8 +311,8 @@ class ChaiTools:
             cyclic=True,
             n_trials=n_trials,
             n_cycles=n_cycles,
-            gpu_id=self.gpu_id,
             use_msa_for_af3=True,
+            dry_run=dry_run,
             ctx=ctx,
         )
     
@@ -147,12 +324,16 @@ class ChaiTools:
         percent_X: int = 50,
         n_trials: int = 1,
         n_cycles: int = 5,
+        dry_run: bool = False,
         ctx: Context = None,
     ) -> dict[str, Any]:
         """Design a protein binder for a small molecule ligand using Chai (Example 4: ligand binder).
         
         Designs proteins that bind to small molecules specified by SMILES strings.
         Long-running task: 5-10 minutes per design on an H100 GPU.
+        Diffusion steps (50 + target_length, kept within 100-300) and trunk recycles
+        (3, or 2 above 500 residues) follow target_length; set them explicitly with
+        design_protein_advanced_chai.
         
         Args:
             ligand_smiles: SMILES string for the target ligand
@@ -161,6 +342,7 @@ class ChaiTools:
             percent_X: Percentage of X residues (default: 50, matches example)
             n_trials: Number of design trials to generate (default: 1)
             n_cycles: Number of design cycles (default: 5)
+            dry_run: Return the design.py command and a rough GPU-time estimate without running it (default: False)
         
         Returns:
             dict: Results with output directory contents and status
@@ -177,9 +359,9 @@ class ChaiTools:
             target_seq=ligand_smiles,
             n_trials=n_trials,
             n_cycles=n_cycles,
-            gpu_id=self.gpu_id,
             hysteresis_mode="esm",
             temperature=0.01,
+            dry_run=dry_run,
             ctx=ctx,
         )
     
@@ -194,8 +376,8 @@ class ChaiTools:
         n_cycles: int = 5,
         # Optional parameters with defaults
         cyclic: bool = False,
-        n_recycles: int = 3,
-        n_diff_steps: int = 200,
+        n_recycles: Optional[int] = None,
+        n_diff_steps: Optional[int] = None,
         hysteresis_mode: str = "templates",
         repredict: bool = True,
         omit_aa: str = "",
@@ -205,6 +387,8 @@ class ChaiTools:
         render_freq: int = 100,
         use_msa_for_af3: bool = False,
         plot: bool = True,
+        force: bool = False,
+        dry_run: bool = False,
         ctx: Context = None,
     ) -> dict[str, Any]:
         """Advanced Chai design with full parameter control.
@@ -222,8 +406,8 @@ class ChaiTools:
             n_trials: Number of independent optimization trials (default: 1)
             n_cycles: Number of folding/design optimization cycles (default: 5)
             cyclic: Enable cyclic topology for the designed chain (default: False)
-            n_recycles: Number of trunk recycles per fold step (default: 3)
-            n_diff_steps: Diffusion steps for structure sampling (default: 200)
+            n_recycles: Number of trunk recycles per fold step (default: 3, or 2 above 500 residues)
+            n_diff_steps: Diffusion steps for structure sampling (default: 50 + length, kept within 100-300)
             hysteresis_mode: Strategy for template/feature reuse - "templates", "esm", "partial_diffusion", or "none" (default: "templates")
             repredict: Re-predict final best structure without templates for validation (default: True)
             omit_aa: Amino acid types to omit from design (e.g., "C") (default: "")
@@ -233,6 +417,8 @@ class ChaiTools:
             render_freq: Visualization refresh frequency in diffusion steps (default: 100)
             use_msa_for_af3: Use MSA for AlphaFold3 validation (default: False)
             plot: Generate plots for design cycles (default: True)
+            force: Run even if an identical job already completed (default: False)
+            dry_run: Return the design.py command and a rough GPU-time estimate without running it (default: False)
         
         Returns:
             dict: Results with output directory contents and status
@@ -245,7 +431,6 @@ class ChaiTools:
             target_seq=target_seq,
             n_trials=n_trials,
             n_cycles=n_cycles,
-            gpu_id=self.gpu_id,
             cyclic=cyclic,
             n_recycles=n_recycles,
             n_diff_steps=n_diff_steps,
@@ -258,9 +443,56 @@ class ChaiTools:
             render_freq=render_freq,
             use_msa_for_af3=use_msa_for_af3,
             plot=plot,
+            force=force,
+            dry_run=dry_run,
             ctx=ctx,
         )
     
+    async def design_batch_chai(
+        self,
+        jobs: list[ChaiJobSpec],
+        ctx: Context = None,
+    ) -> list[dict[str, Any]]:
+        """Run several Chai design jobs in one call.
+        
+        With persistent workers the jobs share one long-lived process per GPU, so
+        interpreter start-up and imports are paid once for the whole batch.
+        
+        Args:
+            jobs: Per-job parameters; keys match design_protein_advanced_chai
+                (default jobname: "batch_<index>")
+        
+        Returns:
+            list: One result dict per job, in order
+        """
+        total = len(jobs)
+        completed = 0
+        if ctx:
+            await ctx.report_progress(progress=0, total=total)
+        
+        async def run_job(index: int, spec: ChaiJobSpec) -> dict[str, Any]:
+            nonlocal completed
+            params = {
+                "jobname": f"batch_{index}",
+                "length": 120,
+                "percent_X": 0,
+                "seq": "",
+                "target_seq": "",
+                "n_trials": 1,
+                "n_cycles": 5,
+                **spec,
+            }
+            result = await self._run_chai_design(**params)
+            
+            completed += 1
+            if ctx:
+                await ctx.report_progress(progress=completed, total=total)
+            return result
+        
+        return list(await asyncio.gather(*[
+            run_job(index, spec) for index, spec in enumerate(jobs)
+        ]))
+    
     async def _run_chai_design(
         self,
         jobname: str,
@@ -270,11 +502,11 @@ class ChaiTools:
         target_seq: str,
         n_trials: int,
         n_cycles: int,
-        gpu_id: int,
+        gpu_id: Optional[int] = None,
         # Optional parameters with defaults
         cyclic: bool = False,
-        n_recycles: int = 3,
-        n_diff_steps: int = 200,
+        n_recycles: Optional[int] = None,
+        n_diff_steps: Optional[int] = None,
         hysteresis_mode: str = "templates",
         repredict: bool = True,
         omit_aa: str = "",
@@ -284,204 +516,416 @@ class ChaiTools:
         render_freq: int = 100,
         use_msa_for_af3: bool = False,
         plot: bool = True,
+        force: bool = False,
+        dry_run: bool = False,
         ctx: Context = None,
     ) -> dict[str, Any]:
         """Internal method to run Chai protein design with all optional parameters.
         
         This is the least common denominator for all Chai design tools. It handles
         all possible parameter combinations for different design scenarios.
+        
+        Jobs are keyed by a hash of their design.py arguments. Repeating a job that
+        already completed returns its stored results unless force is set, and a job
+        identical to one still running waits for that run instead of starting another.
+        With dry_run, nothing runs: the resolved command, compiler cache environment,
+        expected output directory and a rough GPU-time estimate are returned instead.
+        
+        Without an explicit gpu_id, calls take the configured GPUs in turn. Each
+        design waits for a free slot on its GPU (shared with Boltz). n_diff_steps
+        and n_recycles scale with the design length unless given.
         """
-        lock = get_design_lock()
+        if not self._available:
+            return {
+                "status": "error",
+                "error": f"Protein-Hunter design script not found at {self._design_py}. Please ensure it's properly installed."
+            }
         
-        # Wait for the lock with periodic progress updates
-        total_steps = n_trials * n_cycles
-        wait_interval = 2.0  # Report waiting status every 2 seconds
+        # Short peptides don't need the sampling effort of long chains
+        auto_diff_steps, auto_recycles = _auto_diffusion_params(length)
+        if n_diff_steps is None:
+            n_diff_steps = auto_diff_steps
+        if n_recycles is None:
+            n_recycles = auto_recycles
         
-        while lock.locked():
-            if ctx:
-                await ctx.report_progress(progress=0, total=total_steps)
-            try:
-                await asyncio.wait_for(lock.acquire(), timeout=wait_interval)
-                break
-            except asyncio.TimeoutError:
-                continue
-        else:
-            # Lock wasn't locked, acquire it now
-            await lock.acquire()
+        # Build the arguments with required parameters (--gpu_id is added once a GPU is picked)
+        args = [
+            "--jobname", jobname,
+            "--length", str(_bucket_length(length) if self.pad_to_bucket else length),
+            "--percent_X", str(percent_X),
+            "--seq", seq,
+            "--target_seq", target_seq,
+            "--n_trials", str(n_trials),
+            "--n_cycles", str(n_cycles),
+            "--n_recycles", str(n_recycles),
+            "--n_diff_steps", str(n_diff_steps),
+            "--hysteresis_mode", hysteresis_mode,
+            "--omit_aa", omit_aa,
+            "--temperature", str(temperature),
+            "--render_freq", str(render_freq),
+        ]
+        
+        if self.pad_to_bucket:
+            args.extend(["--original_length", str(length)])
+        
+        # Add optional bias_aa parameter
+        if bias_aa:
+            args.extend(["--bias_aa", bias_aa])
+        
+        # Add boolean flags
+        params = locals()
+        args.extend(flag for name, flag in _BOOL_FLAGS if params[name])
+        
+        # Reuse the results of an identical job that already completed
+        key = hashlib.sha256(json.dumps(args).encode()).hexdigest()[:16]
+        cache_file = self._results_chai / ".cache" / f"{key}.json"
+        
+        if dry_run:
+            return {
+                "status": "dry_run",
+                "key": key,
+                "cached": _load_cached_result(cache_file, key) is not None,
+                # --gpu_id is appended at run time (None: the next of the configured GPUs)
+                "cmd": self._cmd_prefix + args,
+                "gpu_id": gpu_id,
+                "env": {var: self._env[var] for var in (*_COMPILE_CACHE_DIRS, "XLA_FLAGS")},
+                "output_dir": str(self._results_chai / jobname),
+                "estimated_gpu_seconds": _estimate_gpu_seconds(
+                    length + _target_tokens(target_seq), n_trials, n_cycles, n_diff_steps
+                ),
+            }
+        
+        if not force:
+            cached = _load_cached_result(cache_file, key)
+            if cached is not None:
+                return cached
+        
+        # Join an identical job that is still running
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._execute_chai_design(args, key, jobname, n_trials * n_cycles, n_cycles, gpu_id, ctx)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
         
+        self._inflight_waiters[key] += 1
         try:
-            # Find the Protein-Hunter directory
-            protein_hunter_dir = Path(__file__).parent.parent.parent / "Protein-Hunter"
-            if not protein_hunter_dir.exists():
-                return {
-                    "status": "error",
-                    "error": f"Protein-Hunter directory not found at {protein_hunter_dir}. Please ensure it's properly installed."
-                }
-            
-            # Build the command with required parameters
-            cmd = [
-                "python", str(protein_hunter_dir / "chai_ph" / "design.py"),
-                "--jobname", jobname,
-                "--length", str(length),
-                "--percent_X", str(percent_X),
-                "--seq", seq,
-                "--target_seq", target_seq,
-                "--n_trials", str(n_trials),
-                "--n_cycles", str(n_cycles),
-                "--n_recycles", str(n_recycles),
-                "--n_diff_steps", str(n_diff_steps),
-                "--hysteresis_mode", hysteresis_mode,
-                "--omit_aa", omit_aa,
-                "--temperature", str(temperature),
-                "--render_freq", str(render_freq),
-                "--gpu_id", str(gpu_id),
-            ]
-            
-            # Add optional bias_aa parameter
-            if bias_aa:
-                cmd.extend(["--bias_aa", bias_aa])
-            
-            # Add boolean flags
-            if cyclic:
-                cmd.append("--cyclic")
-            if repredict:
-                cmd.append("--repredict")
-            if scale_temp_by_plddt:
-                cmd.append("--scale_temp_by_plddt")
-            if use_msa_for_af3:
-                cmd.append("--use_msa_for_af3")
-            if plot:
-                cmd.append("--plot")
-            
-            # Report initial progress
-            total_steps = n_trials * n_cycles
+            return await asyncio.shield(task)
+        finally:
+            self._inflight_waiters[key] -= 1
+            if not self._inflight_waiters[key]:
+                del self._inflight_waiters[key]
+                # Every caller gave up (e.g. disconnected): stop the GPU job too
+                task.cancel()
+    
+    async def _execute_chai_design(
+        self,
+        args: list[str],
+        key: str,
+        jobname: str,
+        total_steps: int,
+        n_cycles: int,
+        gpu_id: Optional[int],
+        ctx: Optional[Context],
+    ) -> dict[str, Any]:
+        """Run one Chai design job on a GPU and collect its results.
+        
+        Args:
+            args: Arguments for design.py, without --gpu_id
+            key: Job key (hash of args)
+            jobname: Name of the job, which names its output directory
+            total_steps: Progress steps of the whole job (trials x cycles)
+            n_cycles: Cycles per trial, used to turn run/step lines into steps
+            gpu_id: GPU to run on, or None for the next configured GPU
+            ctx: MCP context for progress reporting
+        
+        Returns:
+            dict: Results with output directory contents and status
+        """
+        if gpu_id is None:
+            gpu_id = next(self._gpu_cycle)
+        
+        # Report waiting status while queued for a free slot on the GPU
+        async def report_waiting() -> None:
             if ctx:
                 await ctx.report_progress(progress=0, total=total_steps)
-            
-            # Run the design process
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=str(protein_hunter_dir)
-            )
-            
-            # Track progress by reading output
-            current_trial = 0
-            current_cycle = 0
-            
-            # Read stdout line by line to track progress
-            while True:
-                line = await process.stdout.readline()
-                if not line:
-                    break
+        
+        async with design_slot(gpu_id, report_waiting):
+            try:
+                cmd = self._cmd_prefix + args + ["--gpu_id", str(gpu_id)]
+                
+                # Report initial progress
+                reporter = ProgressReporter(ctx, total_steps, min_interval=CHAI_PROGRESS_MIN_INTERVAL)
+                await reporter.report(0)
+                
+                # Track progress by reading output
+                reported = None
+                
+                async def handle_output(block: bytes) -> None:
+                    nonlocal reported
                     
-                line_str = line.decode().strip()
+                    # Only the last step line of a block matters, and only if it moved on
+                    matches = _RE_STEP.findall(block)
+                    if matches:
+                        latest = (int(matches[-1][0]), int(matches[-1][1]))
+                        if latest != reported:
+                            reported = latest
+                            await reporter.report(latest[0] * n_cycles + latest[1])
                 
-                # Parse progress from output patterns
-                # Actual format: "./results_chai/{jobname}/run_X | Step Y: ..."
-                if "run_" in line_str and " | Step" in line_str:
+                worker = None
+                if self.persistent_workers:
+                    if self._worker_pool is None:
+                        self._worker_pool = WorkerPool(
+                            self._design_py, self._ph_dir, preload=CHAI_WORKER_PRELOAD, env=self._env
+                        )
+                    worker = await self._worker_pool.get(gpu_id)
+                
+                if worker is not None:
+                    # Run the design in the persistent worker (arguments after "python design.py")
                     try:
-                        # Extract run number (trial)
-                        run_parts = line_str.split("run_")
-                        if len(run_parts) > 1:
-                            run_num = run_parts[1].split(" ")[0].split("/")[0]
-                            current_trial = int(run_num)
-                        
-                        # Extract step number (cycle)
-                        if "Step" in line_str:
-                            step_parts = line_str.split("Step")
-                            if len(step_parts) > 1:
-                                step_num = step_parts[1].split(":")[0].strip()
-                                current_cycle = int(step_num)
-                                
-                                progress = current_trial * n_cycles + current_cycle
-                                if ctx:
-                                    await ctx.report_progress(
-                                        progress=min(progress, total_steps),
-                                        total=total_steps
-                                    )
-                    except (ValueError, IndexError):
-                        pass
-            
-            # Wait for process to complete
-            await process.wait()
-            
-            # Report 100% completion
-            if ctx:
-                await ctx.report_progress(progress=total_steps, total=total_steps)
-            
-            if process.returncode != 0:
-                stderr = await process.stderr.read()
-                return {
-                    "status": "error",
-                    "error": f"Design process failed with return code {process.returncode}",
-                    "stderr": stderr.decode()
-                }
-            
-            # Find the output directory (Chai stores results differently than Boltz)
-            output_dir = protein_hunter_dir / "results_chai" / jobname
-            
-            if not output_dir.exists():
-                # Try alternative path structure if the above doesn't exist
-                output_dir = protein_hunter_dir / "outputs" / jobname
-            
-            if not output_dir.exists():
-                return {
-                    "status": "error",
-                    "error": f"Output directory not found at {output_dir}. Design may have failed."
-                }
-            
-            # Read results from output directory for LLM-friendly response
-            try:
-                results = []
-                # Look for run directories
-                for run_dir in sorted(output_dir.glob("run_*")):
-                    if not run_dir.is_dir():
-                        continue
-                    
-                    run_info = {"run": run_dir.name}
-                    
-                    # Look for final PDB file
-                    pdb_files = list(run_dir.glob("*.pdb"))
-                    if pdb_files:
-                        run_info["pdb_file"] = str(pdb_files[-1])
+                        returncode, stderr = await worker.submit(cmd[2:], handle_output)
+                    except WorkerError:
+                        # The worker crashed; rerun the design in a fresh process instead
+                        self._worker_pool.mark_failed(gpu_id)
+                        worker = None
+                
+                if worker is None:
+                    # Run the design process
+                    process = await asyncio.create_subprocess_exec(
+                        *cmd,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        cwd=os.fspath(self._ph_dir),
+                        env=self._env,
+                        close_fds=True,
+                        # Own process group, so the design and its children can be signalled together
+                        start_new_session=True,
+                    )
                     
-                    # Look for metrics JSON if available
-                    metrics_file = run_dir / "metrics.json"
-                    if metrics_file.exists():
-                        with open(metrics_file, 'r') as f:
-                            run_info["metrics"] = json.load(f)
+                    # Read stdout in large chunks to track progress, draining stderr at the
+                    # same time so a verbose run can't stall on a full stderr pipe
+                    async def read_stdout() -> None:
+                        async for block in iter_line_blocks(process.stdout):
+                            await handle_output(block)
                     
-                    # Look for sequence file
-                    seq_file = run_dir / "sequence.txt"
-                    if seq_file.exists():
-                        with open(seq_file, 'r') as f:
-                            run_info["sequence"] = f.read().strip()
+                    stderr_tail = TailBuffer()
+                    try:
+                        await asyncio.gather(read_stdout(), pump(process.stderr, stderr_tail.append))
+                        
+                        # Wait for process to complete
+                        await process.wait()
+                    except asyncio.CancelledError:
+                        # Don't leave an orphaned design holding GPU memory
+                        await terminate_process_group(process)
+                        raise
+                    returncode = process.returncode
+                    stderr = stderr_tail.text() if returncode != 0 else ""
+                
+                # Report 100% completion
+                await reporter.finish()
+                
+                if returncode != 0:
+                    return {
+                        "status": "error",
+                        "error": f"Design process failed with return code {returncode}",
+                        "stderr": stderr,
+                        # Shell-ready command to reproduce the failure by hand
+                        "command": shlex.join(cmd),
+                    }
+                
+                # Find the output directory (Chai stores results differently than Boltz)
+                output_dir = self._results_chai / jobname
+                
+                if not output_dir.exists():
+                    # Try alternative path structure if the above doesn't exist
+                    output_dir = self._outputs / jobname
+                
+                if not output_dir.exists():
+                    return {
+                        "status": "error",
+                        "error": f"Output directory not found at {output_dir}. Design may have failed."
+                    }
+                
+                # Read results from output directory for LLM-friendly response
+                try:
+                    # Look for run directories
+                    with os.scandir(output_dir) as entries:
+                        run_dirs = sorted(
+                            entry.path for entry in entries
+                            if entry.name.startswith("run_") and entry.is_dir()
+                        )
+                    # Read runs in worker threads so large jobs don't block the event loop
+                    results = list(await asyncio.gather(*[
+                        asyncio.to_thread(_collect_run, Path(run_dir)) for run_dir in run_dirs
+                    ]))
                     
-                    results.append(run_info)
+                    result = {
+                        "status": "completed",
+                        "key": key,
+                        "cached": False,
+                        "output_dir": str(output_dir),
+                        "jobname": jobname,
+                        "num_results": len(results),
+                        "results": results
+                    }
+                    _store_result(self._results_chai / ".cache" / f"{key}.json", output_dir, result)
+                    return result
+                except Exception as e:
+                    # Fallback to basic info if reading fails
+                    return {
+                        "status": "completed",
+                        "output_dir": str(output_dir),
+                        "jobname": jobname,
+                        "note": f"Results available but detailed parsing failed: {str(e)}"
+                    }
                 
-                return {
-                    "status": "completed",
-                    "output_dir": str(output_dir),
-                    "jobname": jobname,
-                    "num_results": len(results),
-                    "results": results
-                }
             except Exception as e:
-                # Fallback to basic info if reading fails
                 return {
-                    "status": "completed",
-                    "output_dir": str(output_dir),
-                    "jobname": jobname,
-                    "note": f"Results available but detailed parsing failed: {str(e)}"
+                    "status": "error",
+                    "error": str(e)
                 }
-            
-        except Exception as e:
-            return {
-                "status": "error",
-                "error": str(e)
-            }
-        finally:
-            # Always release the lock
-            lock.release()
\ No newline at end of file
+
+
+def _load_cached_result(cache_file: Path, key: str) -> Optional[dict[str, Any]]:
+    """Return the stored result of a completed job, or None if it is missing or stale.
+    
+    A result is stale once its output directory was overwritten by another job
+    with the same name, which replaces the completion marker's key.
+    """
+    try:
+        result = _load_json(os.fspath(cache_file))
+        marker = Path(result["output_dir"]) / JOB_COMPLETE_MARKER
+        if marker.read_text() != key:
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return {**result, "cached": True}
+
+
+def _store_result(cache_file: Path, output_dir: Path, result: dict[str, Any]) -> None:
+    """Store a completed job's result and mark its output directory with the job key."""
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    part_path = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.part")
+    part_path.write_text(json.dumps(result))
+    os.replace(part_path, cache_file)
+    (output_dir / JOB_COMPLETE_MARKER).write_text(result["key"])
+
+
+def _estimate_gpu_seconds(tokens: int, n_trials: int, n_cycles: int, n_diff_steps: int) -> int:
+    """Roughly estimate the GPU time of a design job.
+    
+    Sampling cost grows with diffusion steps x tokens^2 (pair representation), once
+    per cycle of every trial. Meant for planning and queue placement, not as a promise.
+    
+    Args:
+        tokens: Designed chain length plus target tokens (see _target_tokens)
+        n_trials: Independent trials
+        n_cycles: Design cycles per trial
+        n_diff_steps: Diffusion steps per fold
+    
+    Returns:
+        int: Estimated GPU seconds
+    """
+    return round(n_trials * n_cycles * n_diff_steps * tokens ** 2 * _GPU_SECONDS_PER_STEP_TOKEN2)
+
+
+def _target_tokens(target_seq: str) -> int:
+    """Count the tokens a target adds: one per residue of a protein, one per heavy atom of a SMILES.
+    
+    Chai tokenizes ligands per atom, so the character count of a SMILES string
+    (bonds, ring closures, charges) would overstate its size.
+    """
+    if _RE_PROTEIN.fullmatch(target_seq):
+        return len(target_seq) - target_seq.count(":")
+    return len(_RE_SMILES_ATOM.findall(target_seq))
+
+
+def _auto_diffusion_params(length: int) -> tuple[int, int]:
+    """Pick (n_diff_steps, n_recycles) for a design length.
+    
+    Diffusion cost grows with steps x length^2, so short designs use fewer steps
+    (50 + length, kept within 100-300) and long chains drop to two recycles.
+    """
+    n_diff_steps = min(max(50 + length, 100), 300)
+    n_recycles = 2 if length > 500 else 3
+    return n_diff_steps, n_recycles
+
+
+def _bucket_length(length: int) -> int:
+    """Round a design length up to the next of LENGTH_BUCKETS (unchanged past the largest)."""
+    return next((bucket for bucket in LENGTH_BUCKETS if bucket >= length), length)
+
+
+def _collect_run(run_dir: Path) -> dict[str, Any]:
+    """Summarize one run directory from a single scan of its entries.
+    
+    Args:
+        run_dir: A run_* directory of a Chai job
+    
+    Returns:
+        dict: Run name, plus the final PDB file, metrics summary and URI, and sequence
+            when present
+    """
+    run_info: dict[str, Any] = {"run": run_dir.name}
+    pdb_files = []
+    metrics_path = seq_path = None
+    with os.scandir(run_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.endswith(".pdb"):
+                pdb_files.append(entry.path)
+            elif name == "metrics.json":
+                metrics_path = entry.path
+            elif name == "sequence.txt":
+                seq_path = entry.path
+    
+    # Look for final PDB file (the highest cycle number)
+    if pdb_files:
+        run_info["pdb_file"] = max(pdb_files, key=_natural_key)
+    
+    # Look for metrics JSON if available; inline only its scalars and link the rest
+    if metrics_path:
+        run_info["metrics_summary"] = _summarize_metrics(_load_json(metrics_path))
+        run_info["metrics_uri"] = METRICS_URI_TEMPLATE.format(jobname=run_dir.parent.name, run=run_dir.name)
+    
+    # Look for sequence file
+    if seq_path:
+        with open(seq_path, 'r') as f:
+            run_info["sequence"] = f.read().strip()
+    
+    return run_info
+
+
+def _natural_key(name: str) -> list[Any]:
+    """Sort key comparing the digit runs of a name numerically ("cycle_9" < "cycle_10")."""
+    return [int(part) if part.isdigit() else part for part in _RE_DIGITS.split(name)]
+
+
+def _summarize_metrics(metrics: Any) -> dict[str, Any]:
+    """Reduce run metrics to scalars, keeping the final value of per-step series.
+    
+    Args:
+        metrics: Parsed metrics.json of a run
+    
+    Returns:
+        dict: Scalar metrics as-is, plus "final_<name>" for each numeric series
+    """
+    if not isinstance(metrics, dict):
+        return {}
+    summary = {}
+    for name, value in metrics.items():
+        if isinstance(value, (int, float, str)):
+            summary[name] = value
+        elif isinstance(value, list) and value and isinstance(value[-1], (int, float)):
+            summary[f"final_{name}"] = value[-1]
+    return summary
+
+
+def _load_json(path: str) -> Any:
+    """Parse a JSON file, with orjson when it is installed."""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r') as f:
+        return json.load(f)
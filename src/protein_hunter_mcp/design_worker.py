@@ -0,0 +1,302 @@
+"""Persistent worker processes for running Protein-Hunter design scripts.
+
+Spawning ``python design.py`` for every request pays the full interpreter,
+torch and CUDA start-up cost each time. A worker is a long-lived interpreter
+that imports the heavy modules once and then runs the design script in-process
+for every job it receives, so only the first job pays that cost. The script
+itself is re-executed per job, so anything it loads at run time (notably the
+model weights) is still loaded for every job.
+
+Protocol: the client writes one JSON object per line to the worker's stdin,
+``{"id": <int>, "argv": [...]}``. The worker runs the script with that argv,
+passing its stdout through unchanged (so progress lines can be parsed as
+usual), and then prints ``RESULT_PREFIX {"id": <int>}`` on stderr and
+``RESULT_PREFIX {"id": <int>, "returncode": <int>}`` on stdout, each on a line
+of its own.
+
+Run as ``python -m protein_hunter_mcp.design_worker <design.py> [--preload MODULE ...] [--warm-gpu ID]``.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import runpy
+import sys
+import traceback
+from contextlib import aclosing
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from protein_hunter_mcp.progress import TailBuffer, iter_line_blocks, terminate_process_group
+
+# Marks protocol lines on the worker's stdout, distinguishing them from script output
+RESULT_PREFIX = "@@protein_hunter_worker "
+_RESULT_PREFIX_BYTES = RESULT_PREFIX.encode()
+
+
+# ==================== WORKER SIDE ====================
+
+def _run_script(script: Path, argv: list[str]) -> int:
+    """Run a design script as ``__main__`` with the given argv and return its exit code."""
+    sys.argv = [str(script), *argv]
+    try:
+        runpy.run_path(str(script), run_name="__main__")
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def _emit(message: dict, stream=None) -> None:
+    stream = stream or sys.stdout
+    # Start on a fresh line even if the script's last output lacked a newline
+    # (e.g. a tqdm bar ending in "\r"), so the marker is never glued onto it
+    stream.write(f"\n{RESULT_PREFIX}{json.dumps(message)}\n")
+    stream.flush()
+
+
+def _warm_gpu(gpu_id: int) -> None:
+    """Create the CUDA context on a GPU up front so the first job doesn't pay for it."""
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available() and gpu_id < torch.cuda.device_count():
+        torch.cuda.set_device(gpu_id)
+        torch.zeros(1, device=f"cuda:{gpu_id}")
+
+
+def serve(script: Path, preload: list[str], warm_gpu: Optional[int] = None) -> None:
+    """Preload modules, announce readiness, then run jobs read from stdin until EOF."""
+    # Match `python design.py`, which puts the script directory first on sys.path
+    sys.path.insert(0, str(script.parent))
+    for module in preload:
+        importlib.import_module(module)
+    if warm_gpu is not None:
+        _warm_gpu(warm_gpu)
+    _emit({"ready": True})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        returncode = _run_script(script, request["argv"])
+        # Mark the end of the job on stderr too, so the client knows it has all of it
+        _emit({"id": request["id"]}, sys.stderr)
+        _emit({"id": request["id"], "returncode": returncode})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Persistent Protein-Hunter design worker")
+    parser.add_argument("script", type=Path, help="Design script to run for each job")
+    parser.add_argument("--preload", action="append", default=[], help="Module to import at start-up")
+    parser.add_argument("--warm-gpu", type=int, help="GPU to create a CUDA context on at start-up")
+    args = parser.parse_args()
+    serve(args.script.resolve(), args.preload, args.warm_gpu)
+
+
+# ==================== CLIENT SIDE ====================
+
+class WorkerError(RuntimeError):
+    """Raised when a worker process dies while running a job."""
+
+
+def _split_result(block: bytes) -> tuple[bytes, Optional[dict]]:
+    """Split a block of worker stdout into script output and a protocol message.
+
+    The protocol message is always the last thing a worker prints before it waits
+    for the next request, so nothing follows it within a block.
+    """
+    index = block.find(_RESULT_PREFIX_BYTES)
+    if index < 0:
+        return block, None
+    message = block[index + len(_RESULT_PREFIX_BYTES):].split(b"\n", 1)[0]
+    return block[:index], json.loads(message)
+
+
+class DesignWorker:
+    """Client handle for one persistent worker process; runs one job at a time."""
+
+    def __init__(
+        self,
+        script: Path,
+        cwd: Path,
+        preload: tuple[str, ...] = (),
+        env: Optional[dict[str, str]] = None,
+        gpu_id: Optional[int] = None,
+    ):
+        self.script = script
+        self.cwd = cwd
+        self.preload = preload
+        self.env = env
+        self.gpu_id = gpu_id
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._stderr_tail = TailBuffer()
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._stderr_done: asyncio.Queue[int] = asyncio.Queue()
+        self._lock = asyncio.Lock()
+        self._next_id = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self) -> bool:
+        """Spawn the worker and wait until it is ready.
+
+        Returns:
+            bool: False if the worker exited before becoming ready
+        """
+        cmd = [sys.executable, "-m", "protein_hunter_mcp.design_worker", str(self.script)]
+        for module in self.preload:
+            cmd.extend(["--preload", module])
+        if self.gpu_id is not None:
+            cmd.extend(["--warm-gpu", str(self.gpu_id)])
+        self._process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=os.fspath(self.cwd),
+            env=self.env,
+            close_fds=True,
+            # Own process group, so the worker and its children can be signalled together
+            start_new_session=True,
+        )
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+
+        async with aclosing(iter_line_blocks(self._process.stdout)) as blocks:
+            async for block in blocks:
+                _, message = _split_result(block)
+                if message is not None and message.get("ready"):
+                    return True
+        await self._process.wait()
+        return False
+
+    async def _drain_stderr(self) -> None:
+        # Keep the pipe empty so a chatty job can never block on a full stderr buffer.
+        # Blocks rather than readline(): progress bars that only print "\r" would
+        # otherwise grow one line past the stream limit.
+        async for block in iter_line_blocks(self._process.stderr):
+            # Output stays bytes; only an error report decodes it
+            while (index := block.find(_RESULT_PREFIX_BYTES)) >= 0:
+                self._stderr_tail.append(block[:index])
+                message, _, block = block[index + len(_RESULT_PREFIX_BYTES):].partition(b"\n")
+                self._stderr_done.put_nowait(json.loads(message)["id"])
+            self._stderr_tail.append(block)
+
+    def _stderr_text(self) -> str:
+        return self._stderr_tail.text()
+
+    async def submit(
+        self,
+        argv: list[str],
+        on_output: Callable[[bytes], Awaitable[None]],
+    ) -> tuple[int, str]:
+        """Run one job on the worker.
+
+        Args:
+            argv: Arguments for the design script (without the interpreter and script path)
+            on_output: Called with each block of complete stdout lines the script prints
+
+        Returns:
+            tuple: (return code, stderr printed while the job ran)
+        """
+        async with self._lock:
+            if not self.alive:
+                raise WorkerError("Design worker is not running")
+
+            self._next_id += 1
+            job_id = self._next_id
+            self._stderr_tail.clear()
+            try:
+                self._process.stdin.write((json.dumps({"id": job_id, "argv": argv}) + "\n").encode())
+                await self._process.stdin.drain()
+
+                async with aclosing(iter_line_blocks(self._process.stdout)) as blocks:
+                    async for block in blocks:
+                        output, message = _split_result(block)
+                        if output:
+                            await on_output(output)
+                        if message is not None and message.get("id") == job_id:
+                            while await self._stderr_done.get() != job_id:
+                                pass
+                            return message["returncode"], self._stderr_text()
+            except asyncio.CancelledError:
+                # A job can't be interrupted in-process: stop the worker so it frees the
+                # GPU (the pool starts a fresh one for the next request)
+                await terminate_process_group(self._process)
+                raise
+            raise WorkerError(
+                "Design worker exited while running a job:\n" + self._stderr_text()
+            )
+
+    async def close(self) -> None:
+        """Close the worker's stdin so it exits after the current job."""
+        if self.alive:
+            self._process.stdin.close()
+            await self._process.wait()
+        if self._stderr_task is not None:
+            await self._stderr_task
+
+
+class WorkerPool:
+    """Lazily started persistent workers, one per GPU, each holding a warm CUDA context.
+
+    A GPU whose worker failed to start or crashed during a job is remembered, and
+    get() returns None for it from then on so callers go straight to a fresh
+    process instead of paying for another doomed start-up.
+    """
+
+    def __init__(
+        self,
+        script: Path,
+        cwd: Path,
+        preload: tuple[str, ...] = (),
+        env: Optional[dict[str, str]] = None,
+    ):
+        self.script = script
+        self.cwd = cwd
+        self.preload = preload
+        self.env = env
+        self._workers: dict[int, DesignWorker] = {}
+        self._failed: set[int] = set()
+        self._start_lock = asyncio.Lock()
+
+    async def get(self, gpu_id: int) -> Optional[DesignWorker]:
+        """Return a ready worker for gpu_id, or None if workers failed on that GPU."""
+        async with self._start_lock:
+            if gpu_id in self._failed:
+                return None
+            worker = self._workers.get(gpu_id)
+            if worker is not None and worker.alive:
+                return worker
+            worker = DesignWorker(self.script, self.cwd, self.preload, self.env, gpu_id)
+            if not await worker.start():
+                self._failed.add(gpu_id)
+                return None
+            self._workers[gpu_id] = worker
+            return worker
+
+    def mark_failed(self, gpu_id: int) -> None:
+        """Stop using workers on gpu_id, e.g. after one crashed while running a job."""
+        self._failed.add(gpu_id)
+
+    async def close(self) -> None:
+        """Shut down all workers."""
+        for worker in self._workers.values():
+            await worker.close()
+        self._workers.clear()
+
+
+if __name__ == "__main__":
+    main()
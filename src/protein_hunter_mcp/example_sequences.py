@@ -1,26 +1,52 @@
 # ==================== PROTEIN SEQUENCES FROM EXAMPLES ====================
-# These sequences are used in various examples from the README
-
-# PDL1 protein sequence - used in examples 1, 2, 3, 4, 5, 7
-EXAMPLE_PDL1_SEQUENCE = "AFTVTVPKDLYVVEYGSNMTIECKFPVEKQLDLAALIVYWEMEDKNIIQFVHGEEDLKVQHSSYRQRARLLKDQLSLGNAALQITDVKLQDAGVYRCMISYGGADYKRITVKVNAPYAAALE"
-
-# Shorter PDL1 variant - used in example 2 (template example)
-EXAMPLE_PDL1_SHORT_SEQUENCE = "FTVTVPKDLYVVEYGSNMTIECKFPVEKQLDLAALIVYWEMEDKNIIQFVHGEEDLKVQHSSYRQRARLLKDQLSLGNAALQITDVKLQDAGVYRCMISYGGADYKRITVKVNK"
-
-# Multimer protein sequence - used in example 4 (1GNW dimer)
-EXAMPLE_MULTIMER_SEQUENCE = "AGIKVFGHPASIATRRVLIALHEKNLDFELVHVELKDGEHKKEPFLSRNPFGQVPAFEDGDLKLFESRAITQYIAHRYENQGTNLLQTDSKNISQYAIMAIGMQVEDHQFDPVASKLAFEQIFKSIYGLTTDEAVVAEEEAKLAKVLDVYEARLKEFKYLAGETFTLTDLHHIPAIQYLLGTPTKKLFTERPRVNEWVAEITKRPASEKVQ"
-
-# RNA sequence - used in example 6
-EXAMPLE_RNA_SEQUENCE = "AGAGAGAGA"
-
-# Longer RNA sequence - used in nucleic acid binding example
-EXAMPLE_RNA_LONG_SEQUENCE = "AGAGAGA"
-
-# Small molecule ligand CCD code - used in example 5
-EXAMPLE_LIGAND_SAM = "SAM"
-
-# SMILES string for ligand binder design (Chai example)
-EXAMPLE_LIGAND_SMILES = "O=C(NCc1cocn1)c1cnn(C)c1C(=O)Nc1ccn2cc(nc2n1)c1ccccc1"
-
-# Generic target sequence (20 amino acids) - Chai unconditional design
-EXAMPLE_GENERIC_TARGET = "ACDEFGHIKLMNPQRSTVWY"
\ No newline at end of file
+# These sequences are used in various examples from the README.
+# They live in resources/<name>.fasta and are only read on first use.
+
+from functools import cache
+from pathlib import Path
+
+RESOURCES_DIR = Path(__file__).with_name("resources")
+
+# Legacy constant names -> example names accepted by get_example()
+_LEGACY_NAMES = {
+    # PDL1 protein sequence - used in examples 1, 2, 3, 4, 5, 7
+    "EXAMPLE_PDL1_SEQUENCE": "pdl1",
+    # Shorter PDL1 variant - used in example 2 (template example)
+    "EXAMPLE_PDL1_SHORT_SEQUENCE": "pdl1_short",
+    # Multimer protein sequence - used in example 4 (1GNW dimer)
+    "EXAMPLE_MULTIMER_SEQUENCE": "multimer",
+    # RNA sequence - used in example 6
+    "EXAMPLE_RNA_SEQUENCE": "rna",
+    # Longer RNA sequence - used in nucleic acid binding example
+    "EXAMPLE_RNA_LONG_SEQUENCE": "rna_long",
+    # Small molecule ligand CCD code - used in example 5
+    "EXAMPLE_LIGAND_SAM": "ligand_sam",
+    # SMILES string for ligand binder design (Chai example)
+    "EXAMPLE_LIGAND_SMILES": "ligand_smiles",
+    # Generic target sequence (20 amino acids) - Chai unconditional design
+    "EXAMPLE_GENERIC_TARGET": "generic_target",
+}
+
+
+@cache
+def get_example(name: str) -> str:
+    """Load an example sequence (or ligand code/SMILES) by name.
+
+    Args:
+        name: Example name, e.g. "pdl1", "multimer" or "ligand_smiles"
+
+    Returns:
+        str: The example with FASTA header lines and line breaks removed
+    """
+    path = RESOURCES_DIR / f"{name}.fasta"
+    if not path.is_file():
+        raise KeyError(f"Unknown example: {name}")
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return "".join(line.strip() for line in lines if not line.startswith(">"))
+
+
+def __getattr__(name: str) -> str:
+    """Resolve the legacy EXAMPLE_* constants lazily through get_example()."""
+    if name in _LEGACY_NAMES:
+        return get_example(_LEGACY_NAMES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,169 @@
+"""Helpers for following the output of long-running design processes."""
+
+import asyncio
+import os
+import signal
+import time
+from typing import AsyncIterator, Callable, Optional
+
+from fastmcp import Context
+
+# Bytes requested from a stream per read
+CHUNK_SIZE = 65536
+
+# Bytes of an unfinished line held back before it is passed on anyway
+PARTIAL_MAX_BYTES = 1 << 20
+
+# Minimum seconds between two progress reports to the MCP client
+PROGRESS_MIN_INTERVAL = 0.5
+
+# Bytes of a design process's stderr kept for error reports (the oldest are dropped)
+STDERR_MAX_BYTES = 1 << 20
+
+# Seconds a design process gets to exit after SIGTERM before it is killed
+TERMINATE_GRACE = 5.0
+
+
+async def iter_line_blocks(
+    stream: asyncio.StreamReader,
+    chunk_size: int = CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yield a stream's output in large blocks that end on a line boundary.
+
+    Reading whole chunks instead of single lines keeps per-line Python work (and
+    event loop wake-ups) low for chatty processes. A line split across two reads
+    is held back until it is complete, so regexes can run over each block. "\r"
+    ends a line too, so progress bars that redraw in place are passed on as they
+    go; a line longer than PARTIAL_MAX_BYTES is passed on unfinished rather than
+    buffered without bound.
+
+    Args:
+        stream: Stream to read, e.g. a subprocess's stdout
+        chunk_size: Maximum bytes per read
+
+    Yields:
+        bytes: One or more complete lines, including their trailing "\n" or "\r"
+            (the final block may lack one if the stream did not end with a line
+            break, and so may a block cut at PARTIAL_MAX_BYTES)
+    """
+    partial = b""
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            if partial:
+                yield partial
+            return
+        end = max(chunk.rfind(b"\n"), chunk.rfind(b"\r"))
+        if end < 0:
+            partial += chunk
+            if len(partial) >= PARTIAL_MAX_BYTES:
+                yield partial
+                partial = b""
+            continue
+        yield partial + chunk[:end + 1]
+        partial = chunk[end + 1:]
+
+
+async def pump(
+    stream: asyncio.StreamReader,
+    sink: Callable[[bytes], None],
+    chunk_size: int = CHUNK_SIZE,
+) -> None:
+    """Read a stream to EOF, handing each chunk to sink.
+
+    Run it alongside the stdout reader so a process writing a lot to stderr
+    can never block on a full pipe.
+
+    Args:
+        stream: Stream to drain, e.g. a subprocess's stderr
+        sink: Called with every chunk read
+        chunk_size: Maximum bytes per read
+    """
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            return
+        sink(chunk)
+
+
+class TailBuffer:
+    """Keep only the last max_bytes written to it, e.g. a chatty process's stderr."""
+
+    def __init__(self, max_bytes: int = STDERR_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._buffer = bytearray()
+
+    def append(self, chunk: bytes) -> None:
+        self._buffer += chunk
+        if len(self._buffer) > self.max_bytes:
+            del self._buffer[:-self.max_bytes]
+
+    def text(self) -> str:
+        """Return the kept bytes decoded as text."""
+        return self._buffer.decode(errors="replace")
+
+    def clear(self) -> None:
+        self._buffer.clear()
+
+
+async def terminate_process_group(
+    process: asyncio.subprocess.Process,
+    grace: float = TERMINATE_GRACE,
+) -> None:
+    """Stop a process started with start_new_session=True, together with its children.
+
+    Sends SIGTERM to the process group, then SIGKILL if the process is still
+    running after grace seconds, so a cancelled design frees its GPU promptly.
+
+    Args:
+        process: Process leading its own process group
+        grace: Seconds to wait for a clean exit after SIGTERM
+    """
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            await asyncio.wait_for(process.wait(), grace)
+            return
+        except asyncio.TimeoutError:
+            continue
+
+
+class ProgressReporter:
+    """Forward progress to an MCP context, dropping redundant and too-frequent updates.
+
+    A report is sent only when the value changed and at least min_interval seconds
+    passed since the previous one; finish() always sends the final value.
+    """
+
+    def __init__(
+        self,
+        ctx: Optional[Context],
+        total: int,
+        min_interval: float = PROGRESS_MIN_INTERVAL,
+    ):
+        self.ctx = ctx
+        self.total = total
+        self.min_interval = min_interval
+        self._last_progress: Optional[int] = None
+        self._last_time = float("-inf")
+
+    async def report(self, progress: int) -> None:
+        """Report progress (capped at total) unless it is unchanged or too soon."""
+        if self.ctx is None:
+            return
+        progress = min(progress, self.total)
+        now = time.monotonic()
+        if progress == self._last_progress or now - self._last_time < self.min_interval:
+            return
+        self._last_progress, self._last_time = progress, now
+        await self.ctx.report_progress(progress=progress, total=self.total)
+
+    async def finish(self) -> None:
+        """Report completion regardless of the throttle."""
+        if self.ctx is None:
+            return
+        self._last_progress, self._last_time = self.total, time.monotonic()
+        await self.ctx.report_progress(progress=self.total, total=self.total)
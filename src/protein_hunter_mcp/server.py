@@ -1,25 +1,26 @@
 #!/usr/bin/env python3
 """Protein Hunter MCP Server - Protein design and analysis tools."""
 
+import asyncio
 import os
+import sys
+import warnings
+from contextlib import asynccontextmanager
 from enum import Enum
 from typing import Optional
 from pathlib import Path
-from importlib.metadata import version, PackageNotFoundError
 
 import typer
 
-from protein_hunter_mcp.boltz import BoltzTools
-from protein_hunter_mcp.chai import ChaiTools
+from protein_hunter_mcp.boltz import SUMMARY_URI_TEMPLATE, BoltzTools, detect_gpu_ids
+from protein_hunter_mcp.chai import METRICS_URI_TEMPLATE, ChaiTools
 from typing_extensions import Annotated
 from fastmcp import FastMCP
 
-from protein_hunter_mcp.example_sequences import EXAMPLE_PDL1_SEQUENCE, EXAMPLE_PDL1_SHORT_SEQUENCE, EXAMPLE_MULTIMER_SEQUENCE, EXAMPLE_RNA_SEQUENCE, EXAMPLE_RNA_LONG_SEQUENCE, EXAMPLE_LIGAND_SAM, EXAMPLE_LIGAND_SMILES, EXAMPLE_GENERIC_TARGET
-# Get package version
-try:
-    __version__ = version("protein-hunter-mcp")
-except PackageNotFoundError:
-    __version__ = "unknown"
+from protein_hunter_mcp import __version__
+from protein_hunter_mcp import example_sequences
+from protein_hunter_mcp.example_sequences import get_example
+from protein_hunter_mcp.shared_lock import set_max_concurrent_per_gpu
 
 
 
@@ -33,6 +34,115 @@ DEFAULT_HOST = os.getenv("MCP_HOST", "0.0.0.0")
 DEFAULT_PORT = int(os.getenv("MCP_PORT", "3003"))
 DEFAULT_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
 DEFAULT_GPU_ID = int(os.getenv("GPU_ID", "0"))
+DEFAULT_PERSISTENT_WORKERS = os.getenv("PERSISTENT_WORKERS", "false").lower() in ("1", "true", "yes")
+# Run Boltz inference under bfloat16 autocast (less activation memory, faster on Ampere/Hopper)
+DEFAULT_USE_BF16 = os.getenv("USE_BF16", "false").lower() in ("1", "true", "yes")
+# Build target features in a CPU-only stage and cache them (needs design.py --prepare_features_only)
+DEFAULT_PREPARE_FEATURES = os.getenv("PREPARE_FEATURES", "false").lower() in ("1", "true", "yes")
+# Round Chai design lengths up to a few fixed sizes (needs design.py --original_length)
+DEFAULT_PAD_TO_BUCKET = os.getenv("PAD_TO_BUCKET", "false").lower() in ("1", "true", "yes")
+# Design processes (Boltz and Chai together) allowed on one GPU at a time
+DEFAULT_MAX_CONCURRENT_PER_GPU = int(os.getenv("MAX_CONCURRENT_PER_GPU", "1"))
+# GPUs to run designs on (Boltz shards multi-design runs, Chai takes them in turn):
+# comma-separated IDs, or "all"
+DEFAULT_GPU_IDS = os.getenv("GPU_IDS", "")
+
+
+def parse_gpu_ids(value: str) -> Optional[list[int]]:
+    """Parse a GPU_IDS value ("0,1,2" or "all"); an empty value means none were given."""
+    value = value.strip()
+    if not value:
+        return None
+    if value.lower() == "all":
+        return detect_gpu_ids()
+    return [int(gpu_id) for gpu_id in value.split(",") if gpu_id.strip()]
+
+# MCP resource URIs, interned so resource lookups can short-circuit on identity
+URI_EXAMPLE1_PDL1 = sys.intern("protein://example1/pdl1")
+URI_EXAMPLE2_PDL1_SHORT = sys.intern("protein://example2/pdl1_short")
+URI_EXAMPLE3_PDL1_CONTACT = sys.intern("protein://example3/pdl1_contact")
+URI_EXAMPLE4_MULTIMER = sys.intern("protein://example4/multimer")
+URI_EXAMPLE5_PDL1_LIGAND = sys.intern("protein://example5/pdl1_ligand")
+URI_EXAMPLE5_SAM = sys.intern("ligand://example5/sam")
+URI_EXAMPLE6_RNA = sys.intern("nucleic://example6/rna")
+URI_EXAMPLE7_PDL1_MULTIPLE = sys.intern("protein://example7/pdl1_multiple")
+URI_CHAI_SMILES = sys.intern("ligand://chai/smiles")
+URI_CHAI_GENERIC_TARGET = sys.intern("protein://chai/generic_target")
+URI_CHAI_RUN_METRICS = sys.intern(METRICS_URI_TEMPLATE)
+URI_BOLTZ_RUN_SUMMARY = sys.intern(SUMMARY_URI_TEMPLATE)
+
+# (tool name without prefix, BoltzTools/ChaiTools method) pairs registered as MCP tools
+BOLTZ_TOOLS = (
+    ("design_protein_binder", "design_protein_binder"),
+    ("design_protein_binder_with_template", "design_protein_binder_with_template"),
+    ("design_protein_binder_with_contacts", "design_protein_binder_with_contacts"),
+    ("design_multimer_binder", "design_multimer_binder"),
+    ("design_cyclic_peptide_binder", "design_cyclic_peptide_binder"),
+    ("design_small_molecule_binder", "design_small_molecule_binder"),
+    ("design_nucleic_acid_binder", "design_nucleic_acid_binder"),
+    ("design_heterogeneous_binder", "design_heterogeneous_binder"),
+    #("design_protein_advanced", "design_protein_advanced"),
+)
+CHAI_TOOLS = (
+    ("chai_design_unconditional_protein", "design_unconditional_protein"),
+    ("chai_design_protein_binder", "design_protein_binder_chai"),
+    ("chai_design_cyclic_peptide_binder", "design_cyclic_peptide_binder_chai"),
+    ("chai_design_ligand_binder", "design_ligand_binder_chai"),
+    #("chai_design_protein_advanced", "design_protein_advanced_chai"),
+)
+
+# (URI, resource name, example_sequences key, description) of each example resource
+EXAMPLE_RESOURCES = (
+    (URI_EXAMPLE1_PDL1, "example1_pdl1", "pdl1",
+     "Example 1: PDL1 protein sequence for protein-protein design with all X sequence."),
+    (URI_EXAMPLE2_PDL1_SHORT, "example2_pdl1_short", "pdl1_short",
+     "Example 2: Shorter PDL1 variant for template-based design."),
+    (URI_EXAMPLE3_PDL1_CONTACT, "example3_pdl1_contact", "pdl1",
+     "Example 3: PDL1 sequence for contact specification design."),
+    (URI_EXAMPLE4_MULTIMER, "example4_multimer", "multimer",
+     "Example 4: Multimer protein sequence (1GNW dimer) for multimer binder design."),
+    (URI_EXAMPLE5_PDL1_LIGAND, "example5_pdl1_ligand", "pdl1",
+     "Example 5: PDL1 sequence for small molecule binder design."),
+    (URI_EXAMPLE5_SAM, "example5_sam", "ligand_sam",
+     "Example 5: SAM ligand CCD code for small molecule binder design."),
+    (URI_EXAMPLE6_RNA, "example6_rna", "rna",
+     "Example 6: RNA sequence for DNA/RNA binder design."),
+    (URI_EXAMPLE7_PDL1_MULTIPLE, "example7_pdl1_multiple", "pdl1",
+     "Example 7: PDL1 sequence for designs with multiple/heterogeneous target types."),
+    (URI_CHAI_SMILES, "chai_ligand_smiles", "ligand_smiles",
+     "Chai example: SMILES string for ligand binder design."),
+    (URI_CHAI_GENERIC_TARGET, "chai_generic_target", "generic_target",
+     "Chai example: Generic target sequence (20 amino acids) for unconditional design."),
+)
+
+
+def __getattr__(name: str) -> str:
+    """Keep `from protein_hunter_mcp.server import EXAMPLE_*` working; the names resolve lazily."""
+    if name.startswith("EXAMPLE_"):
+        try:
+            return getattr(example_sequences, name)
+        except AttributeError:
+            pass
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _example_reader(example: str, description: str):
+    """Build a resource function returning one example sequence."""
+    def read_example() -> str:
+        return get_example(example)
+    read_example.__doc__ = description
+    return read_example
+
+
+@asynccontextmanager
+async def _warmup_lifespan(server: "ProteinHunterMCP"):
+    """Warm the Boltz import cache in the background while the server runs."""
+    task = asyncio.create_task(server.boltz_tools.warmup())
+    try:
+        yield {}
+    finally:
+        task.cancel()
+
 
 class ProteinHunterMCP(FastMCP):
     """Protein Hunter MCP Server with protein design and analysis tools."""
@@ -44,17 +154,38 @@ class ProteinHunterMCP(FastMCP):
         transport_mode: str = "stdio",
         output_dir: Optional[str] = None,
         gpu_id: int = DEFAULT_GPU_ID,
+        persistent_workers: bool = DEFAULT_PERSISTENT_WORKERS,
+        gpu_ids: Optional[list[int]] = None,
+        use_bf16: bool = DEFAULT_USE_BF16,
+        prepare_features: bool = DEFAULT_PREPARE_FEATURES,
+        pad_to_bucket: bool = DEFAULT_PAD_TO_BUCKET,
+        max_concurrent_per_gpu: int = DEFAULT_MAX_CONCURRENT_PER_GPU,
         **kwargs
     ):
         """Initialize the Protein Hunter tools with FastMCP functionality."""
+        kwargs.setdefault("lifespan", _warmup_lifespan)
         super().__init__(name=name, **kwargs)
         
         self.prefix = prefix
         self.transport_mode = transport_mode
         self.output_dir = Path(output_dir) if output_dir else Path.cwd() / "protein_hunter_output"
         self.gpu_id = gpu_id
-        self.boltz_tools = BoltzTools(gpu_id=gpu_id)
-        self.chai_tools = ChaiTools(gpu_id=gpu_id)
+        self.gpu_ids = gpu_ids if gpu_ids is not None else parse_gpu_ids(DEFAULT_GPU_IDS)
+        # Configured once here; the tools only take design slots
+        set_max_concurrent_per_gpu(max_concurrent_per_gpu)
+        self.boltz_tools = BoltzTools(
+            gpu_id=gpu_id,
+            persistent_workers=persistent_workers,
+            gpu_ids=self.gpu_ids,
+            use_bf16=use_bf16,
+            prepare_features=prepare_features,
+        )
+        self.chai_tools = ChaiTools(
+            gpu_id=gpu_id,
+            persistent_workers=persistent_workers,
+            gpu_ids=self.gpu_ids,
+            pad_to_bucket=pad_to_bucket,
+        )
         # Create output directory
         self.output_dir.mkdir(parents=True, exist_ok=True)
             
@@ -63,27 +194,28 @@ class ProteinHunterMCP(FastMCP):
     def _register_tools(self):
         """Register Protein Hunter tools and resources."""
         
-        # Register simple LLM-friendly tools for each Boltz example
-        self.tool(name=f"{self.prefix}design_protein_binder")(self.boltz_tools.design_protein_binder)
-        self.tool(name=f"{self.prefix}design_protein_binder_with_template")(self.boltz_tools.design_protein_binder_with_template)
-        self.tool(name=f"{self.prefix}design_protein_binder_with_contacts")(self.boltz_tools.design_protein_binder_with_contacts)
-        self.tool(name=f"{self.prefix}design_multimer_binder")(self.boltz_tools.design_multimer_binder)
-        self.tool(name=f"{self.prefix}design_cyclic_peptide_binder")(self.boltz_tools.design_cyclic_peptide_binder)
-        self.tool(name=f"{self.prefix}design_small_molecule_binder")(self.boltz_tools.design_small_molecule_binder)
-        self.tool(name=f"{self.prefix}design_nucleic_acid_binder")(self.boltz_tools.design_nucleic_acid_binder)
-        self.tool(name=f"{self.prefix}design_heterogeneous_binder")(self.boltz_tools.design_heterogeneous_binder)
-        
-        # Register Boltz advanced tool
-        #self.tool(name=f"{self.prefix}design_protein_advanced")(self.boltz_tools.design_protein_advanced)
-        
-        # Register Chai tools
-        self.tool(name=f"{self.prefix}chai_design_unconditional_protein")(self.chai_tools.design_unconditional_protein)
-        self.tool(name=f"{self.prefix}chai_design_protein_binder")(self.chai_tools.design_protein_binder_chai)
-        self.tool(name=f"{self.prefix}chai_design_cyclic_peptide_binder")(self.chai_tools.design_cyclic_peptide_binder_chai)
-        self.tool(name=f"{self.prefix}chai_design_ligand_binder")(self.chai_tools.design_ligand_binder_chai)
+        # Register simple LLM-friendly tools for each Boltz example (only when
+        # Protein-Hunter is installed; otherwise every call would just fail)
+        if self.boltz_tools.available:
+            for name, method in BOLTZ_TOOLS:
+                self.tool(name=f"{self.prefix}{name}")(getattr(self.boltz_tools, method))
+        else:
+            warnings.warn(
+                "Protein-Hunter Boltz design script not found; Boltz design tools are not registered. "
+                "Run `git submodule update --init --recursive`.",
+                RuntimeWarning,
+            )
         
-        # Register Chai advanced tool
-        #self.tool(name=f"{self.prefix}chai_design_protein_advanced")(self.chai_tools.design_protein_advanced_chai)
+        # Register Chai tools (likewise only when the Chai design script is installed)
+        if self.chai_tools.available:
+            for name, method in CHAI_TOOLS:
+                self.tool(name=f"{self.prefix}{name}")(getattr(self.chai_tools, method))
+        else:
+            warnings.warn(
+                "Protein-Hunter Chai design script not found; Chai design tools are not registered. "
+                "Run `git submodule update --init --recursive`.",
+                RuntimeWarning,
+            )
         
         # Register resources for protein sequences from examples
         self._register_resources()
@@ -92,55 +224,18 @@ class ProteinHunterMCP(FastMCP):
         """Register MCP resources for protein sequences."""
         
         # Register each example sequence as a resource
-        @self.resource(f"protein://example1/pdl1")
-        def example1_pdl1() -> str:
-            """Example 1: PDL1 protein sequence for protein-protein design with all X sequence."""
-            return EXAMPLE_PDL1_SEQUENCE
-        
-        @self.resource(f"protein://example2/pdl1_short")
-        def example2_pdl1_short() -> str:
-            """Example 2: Shorter PDL1 variant for template-based design."""
-            return EXAMPLE_PDL1_SHORT_SEQUENCE
-        
-        @self.resource(f"protein://example3/pdl1_contact")
-        def example3_pdl1_contact() -> str:
-            """Example 3: PDL1 sequence for contact specification design."""
-            return EXAMPLE_PDL1_SEQUENCE
-        
-        @self.resource(f"protein://example4/multimer")
-        def example4_multimer() -> str:
-            """Example 4: Multimer protein sequence (1GNW dimer) for multimer binder design."""
-            return EXAMPLE_MULTIMER_SEQUENCE
-        
-        @self.resource(f"protein://example5/pdl1_ligand")
-        def example5_pdl1_ligand() -> str:
-            """Example 5: PDL1 sequence for small molecule binder design."""
-            return EXAMPLE_PDL1_SEQUENCE
-        
-        @self.resource(f"ligand://example5/sam")
-        def example5_sam() -> str:
-            """Example 5: SAM ligand CCD code for small molecule binder design."""
-            return EXAMPLE_LIGAND_SAM
-        
-        @self.resource(f"nucleic://example6/rna")
-        def example6_rna() -> str:
-            """Example 6: RNA sequence for DNA/RNA binder design."""
-            return EXAMPLE_RNA_SEQUENCE
-        
-        @self.resource(f"protein://example7/pdl1_multiple")
-        def example7_pdl1_multiple() -> str:
-            """Example 7: PDL1 sequence for designs with multiple/heterogeneous target types."""
-            return EXAMPLE_PDL1_SEQUENCE
+        for uri, name, example, description in EXAMPLE_RESOURCES:
+            self.resource(uri, name=name, description=description)(_example_reader(example, description))
         
-        @self.resource(f"ligand://chai/smiles")
-        def chai_ligand_smiles() -> str:
-            """Chai example: SMILES string for ligand binder design."""
-            return EXAMPLE_LIGAND_SMILES
+        # Full per-run metrics of Chai designs, linked from results as metrics_uri
+        self.resource(URI_CHAI_RUN_METRICS, name="chai_run_metrics", mime_type="application/json")(
+            self.chai_tools.read_run_metrics
+        )
         
-        @self.resource(f"protein://chai/generic_target")
-        def chai_generic_target() -> str:
-            """Chai example: Generic target sequence (20 amino acids) for unconditional design."""
-            return EXAMPLE_GENERIC_TARGET
+        # Full summary CSV of Boltz designs, linked from results as results_uri
+        self.resource(URI_BOLTZ_RUN_SUMMARY, name="boltz_run_summary", mime_type="text/csv")(
+            self.boltz_tools.read_run_summary
+        )
     
 
 
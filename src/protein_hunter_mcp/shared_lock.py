@@ -1,19 +1,91 @@
-"""Shared lock for ensuring only one design process runs at a time."""
+"""Per-GPU design slots, so each GPU runs only as many designs as fit in its memory."""
 
 import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
-# Global lock shared between Boltz and Chai design processes
-_design_lock: asyncio.Lock | None = None
+# Design processes allowed on one GPU at a time (shared by Boltz and Chai)
+_max_concurrent_per_gpu = 1
 
+# (limit, semaphore) per GPU ID, created on first use
+_design_slots: dict[int, tuple[int, asyncio.Semaphore]] = {}
+
+# Designs holding or waiting for each GPU's semaphore
+_slot_users: Counter[int] = Counter()
+
+
+def set_max_concurrent_per_gpu(max_concurrent: int) -> None:
+    """Set how many design processes may share one GPU.
+
+    Raise it only when the GPU has room for several model copies. The server sets
+    it once at start-up. A GPU whose semaphore is in use keeps its old limit until
+    every design holding or waiting for it is done, so a GPU never has two
+    semaphores at once.
+
+    Args:
+        max_concurrent: Design processes allowed on one GPU at a time
+    """
+    global _max_concurrent_per_gpu
+    if max_concurrent < 1:
+        raise ValueError("max_concurrent must be at least 1")
+    _max_concurrent_per_gpu = max_concurrent
+    for gpu_id in [gpu_id for gpu_id in _design_slots if not _slot_users[gpu_id]]:
+        del _design_slots[gpu_id]
+
+
+def get_design_slot(gpu_id: int) -> asyncio.Semaphore:
+    """Get or create the design semaphore of a GPU.
+
+    Args:
+        gpu_id: GPU device ID
 
-def get_design_lock() -> asyncio.Lock:
-    """Get or create the global design lock.
-    
     Returns:
-        asyncio.Lock: Shared lock for design processes
+        asyncio.Semaphore: Shared by every Boltz and Chai design on that GPU
     """
-    global _design_lock
-    if _design_lock is None:
-        _design_lock = asyncio.Lock()
-    return _design_lock
+    entry = _design_slots.get(gpu_id)
+    if entry is None or (entry[0] != _max_concurrent_per_gpu and not _slot_users[gpu_id]):
+        entry = _design_slots[gpu_id] = (
+            _max_concurrent_per_gpu, asyncio.Semaphore(_max_concurrent_per_gpu)
+        )
+    return entry[1]
 
+
+@asynccontextmanager
+async def design_slot(
+    gpu_id: int,
+    on_wait: Optional[Callable[[], Awaitable[None]]] = None,
+    wait_interval: float = 2.0,
+) -> AsyncIterator[None]:
+    """Hold a design slot on a GPU for the duration of the block.
+
+    Args:
+        gpu_id: GPU device ID
+        on_wait: Called every wait_interval seconds while waiting for the slot
+            (e.g. to report progress so clients know the job is queued)
+        wait_interval: Seconds between on_wait calls
+    """
+    slot = get_design_slot(gpu_id)
+    _slot_users[gpu_id] += 1
+    try:
+        acquire = asyncio.ensure_future(slot.acquire())
+        try:
+            while True:
+                done, _ = await asyncio.wait({acquire}, timeout=wait_interval)
+                if done:
+                    break
+                if on_wait:
+                    await on_wait()
+        except BaseException:
+            # Give the slot back if it was granted just as we were cancelled
+            if acquire.done() and not acquire.cancelled():
+                slot.release()
+            else:
+                acquire.cancel()
+            raise
+        try:
+            yield
+        finally:
+            slot.release()
+    finally:
+        _slot_users[gpu_id] -= 1
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Shared fixtures: fake Protein-Hunter checkouts and persistent worker environments."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from protein_hunter_mcp.chai import ChaiTools
+
+# Source tree of this checkout, importable by worker processes via PYTHONPATH
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+
+@pytest.fixture
+def worker_env(monkeypatch) -> dict[str, str]:
+    """Let persistent workers import protein_hunter_mcp from this checkout.
+
+    Sets PYTHONPATH for workers that design tools start themselves, and returns
+    the resulting environment for workers a test starts directly.
+    """
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(filter(None, [str(SRC_DIR), os.environ.get("PYTHONPATH")])))
+    return dict(os.environ)
+
+
+@pytest.fixture
+def fake_checkout(tmp_path):
+    """Point BoltzTools or ChaiTools at a fake Protein-Hunter checkout under tmp_path.
+
+    Returns a function taking the tools, the design script's directory
+    ("boltz_ph" or "chai_ph") and the fake design.py source, which returns the tools.
+    """
+    ph_dir = tmp_path / "Protein-Hunter"
+
+    def install(tools, subdir, script):
+        design_py = ph_dir / subdir / "design.py"
+        design_py.parent.mkdir(parents=True, exist_ok=True)
+        design_py.write_text(script)
+        tools._ph_dir = ph_dir
+        tools._design_py = design_py
+        tools._cmd_prefix = [sys.executable, str(design_py)]
+        tools._available = True
+        if isinstance(tools, ChaiTools):
+            tools._results_chai = ph_dir / "results_chai"
+            tools._outputs = ph_dir / "outputs"
+        return tools
+
+    return install
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Tests for the Boltz design tools, run against a fake design.py."""
+
+import csv
+from pathlib import Path
+
+import pytest
+
+from protein_hunter_mcp import boltz
+from protein_hunter_mcp.boltz import _RE_CYCLE, BoltzTools, _merge_summary_csvs, _split_designs
+
+# Stand-in for Protein-Hunter/boltz_ph/design.py: prints cycle lines and writes a
+# summary CSV with one row per design. It crashes when run inside a persistent
+# worker if FAKE_WORKER_CRASH is set, fails after writing the CSV header if
+# FAKE_DESIGN_FAIL is set, and --prepare_features_only always fails after
+# logging the call.
+FAKE_DESIGN_PY = '''\
+import argparse, csv, os, sys
+from pathlib import Path
+
+if os.environ.get("FAKE_WORKER_CRASH") and "protein_hunter_mcp.progress" in sys.modules:
+    os._exit(1)
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--name")
+parser.add_argument("--num_designs", type=int)
+parser.add_argument("--num_cycles", type=int)
+parser.add_argument("--gpu_id")
+parser.add_argument("--prepare_features_only", action="store_true")
+args, _ = parser.parse_known_args()
+
+if args.prepare_features_only:
+    with open("prepare_calls.log", "a") as log:
+        log.write("called\\n")
+    sys.exit(1)
+
+for run in range(args.num_designs):
+    for cycle in range(args.num_cycles):
+        print(f"--- Run {run}, Cycle {cycle} ---", flush=True)
+
+out = Path("results_boltz") / args.name
+out.mkdir(parents=True, exist_ok=True)
+with open(out / "summary_all_runs.csv", "w", newline="") as f:
+    writer = csv.writer(f)
+    writer.writerow(["run", "iptm"])
+    if os.environ.get("FAKE_DESIGN_FAIL"):
+        sys.exit(1)
+    for run in range(args.num_designs):
+        writer.writerow([run, 0.5])
+'''
+
+
+@pytest.fixture
+def make_tools(fake_checkout):
+    """Build BoltzTools running FAKE_DESIGN_PY."""
+    return lambda **kwargs: fake_checkout(BoltzTools(**kwargs), "boltz_ph", FAKE_DESIGN_PY)
+
+
+async def test_crashed_worker_falls_back_to_subprocess(make_tools, monkeypatch, worker_env):
+    """Test that a worker crash reruns the design in a fresh process and retires the worker."""
+    monkeypatch.setenv("FAKE_WORKER_CRASH", "1")
+    monkeypatch.setattr(boltz, "BOLTZ_WORKER_PRELOAD", ())
+    tools = make_tools(persistent_workers=True)
+
+    result = await tools._run_boltz_design(num_designs=1, num_cycles=2, name="crash", protein_seqs="ACDE")
+
+    assert result["status"] == "completed"
+    assert result["num_results"] == 1
+    assert tools._worker_pool._workers, "the worker should have started before crashing"
+    assert await tools._worker_pool.get(0) is None
+    await tools._worker_pool.close()
+
+
+async def test_failed_feature_preparation_is_not_retried(make_tools):
+    """Test that a target whose feature preparation failed skips the stage afterwards."""
+    tools = make_tools(prepare_features=True)
+
+    for name in ("first", "second"):
+        result = await tools._run_boltz_design(num_designs=1, num_cycles=1, name=name, protein_seqs="ACDE")
+        assert result["status"] == "completed"
+
+    assert (tools._ph_dir / "prepare_calls.log").read_text().count("called") == 1
+
+
+def test_cycle_regex():
+    """Test that cycle lines are found in a block of design.py output."""
+    block = b"loading\n--- Run 0, Cycle 3 ---\n--- Run  12 (design_7), Cycle 1 ---\n"
+    assert _RE_CYCLE.findall(block) == [(b"0", b"3"), (b"12", b"1")]
+
+
+def test_split_designs():
+    """Test that designs are spread evenly and a single shard keeps the plain run name."""
+    assert _split_designs(5, [2, 3]) == [(2, 3, "__gpu2"), (3, 2, "__gpu3")]
+    assert _split_designs(2, [0, 1, 2]) == [(0, 1, "__gpu0"), (1, 1, "__gpu1")]
+    assert _split_designs(4, [1]) == [(1, 4, "")]
+    assert _split_designs(1, [0, 1]) == [(0, 1, "")]
+
+
+def test_merge_summary_csvs(tmp_path):
+    """Test that shard CSVs are concatenated with a gpu_id column and the union of fields."""
+    shard0 = tmp_path / "gpu0" / "summary_all_runs.csv"
+    shard1 = tmp_path / "gpu1" / "summary_high_iptm.csv"
+    for path, text in ((shard0, "run,iptm\n0,0.5\n"), (shard1, "run,iptm,plddt\n0,0.9,80\n1,0.8,75\n")):
+        path.parent.mkdir()
+        path.write_text(text)
+
+    merged = _merge_summary_csvs([(0, shard0), (1, shard1)], tmp_path / "merged")
+
+    assert merged.name == "summary_high_iptm.csv"
+    with open(merged) as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames == ["gpu_id", "run", "iptm", "plddt"]
+        rows = list(reader)
+    assert [(row["gpu_id"], row["iptm"], row["plddt"]) for row in rows] == [
+        ("0", "0.5", ""), ("1", "0.9", "80"), ("1", "0.8", "75"),
+    ]
+
+
+async def test_sharded_run_is_merged_and_cached(make_tools):
+    """Test that a multi-GPU run merges its shards and a repeat returns the stored result."""
+    tools = make_tools(gpu_ids=[0, 1])
+
+    result = await tools._run_boltz_design(num_designs=3, num_cycles=1, name="sharded", protein_seqs="ACDE")
+    assert result["status"] == "completed"
+    assert result["cached"] is False
+    assert result["num_results"] == 3
+    assert sorted(row["gpu_id"] for row in result["results"]) == [0, 0, 1]
+    run_name = Path(result["output_dir"]).name
+    assert result["results_uri"] == f"boltz://results/{run_name}/summary"
+    assert tools.read_run_summary(run_name).startswith("gpu_id,run,iptm")
+
+    # The repeat starts on the other GPU, but the job key doesn't depend on GPU order
+    repeat = await tools._run_boltz_design(num_designs=3, num_cycles=1, name="sharded", protein_seqs="ACDE")
+    assert repeat["cached"] is True
+    assert repeat["output_dir"] == result["output_dir"]
+    assert repeat["num_results"] == 3
+
+    forced = await tools._run_boltz_design(
+        num_designs=3, num_cycles=1, name="sharded", protein_seqs="ACDE", force=True
+    )
+    assert forced["cached"] is False
+
+
+async def test_unwritable_feature_cache_runs_full_pipeline(make_tools):
+    """Test that a feature cache that can't be created falls back to the full pipeline."""
+    tools = make_tools(prepare_features=True)
+    # A file where the cache directory should be makes mkdir fail
+    (tools._ph_dir / "cache").write_text("")
+
+    result = await tools._run_boltz_design(num_designs=1, num_cycles=1, name="nocache", protein_seqs="ACDE")
+
+    assert result["status"] == "completed"
+    assert not (tools._ph_dir / "prepare_calls.log").exists()
+
+
+async def test_failed_forced_rerun_is_not_cached(make_tools, monkeypatch):
+    """Test that a forced rerun that fails leaves no completed result behind."""
+    tools = make_tools()
+    design = dict(num_designs=2, num_cycles=1, name="rerun", protein_seqs="ACDE")
+    assert (await tools._run_boltz_design(**design))["status"] == "completed"
+
+    monkeypatch.setenv("FAKE_DESIGN_FAIL", "1")
+    assert (await tools._run_boltz_design(**design, force=True))["status"] == "error"
+    monkeypatch.delenv("FAKE_DESIGN_FAIL")
+
+    result = await tools._run_boltz_design(**design)
+    assert result["cached"] is False
+    assert result["num_results"] == 2
+
+
+@pytest.mark.parametrize("use_pyarrow", [True, False], ids=["pyarrow", "csv-module"])
+def test_summary_rows_are_typed(tmp_path, monkeypatch, use_pyarrow):
+    """Test that summary rows have the same types with and without pyarrow."""
+    if use_pyarrow:
+        pytest.importorskip("pyarrow")
+    else:
+        monkeypatch.setattr(boltz, "pacsv", None)
+    summary_csv = tmp_path / "summary_all_runs.csv"
+    summary_csv.write_text(
+        "gpu_id,run,iptm,plddt,sequence,high_iptm,note\n"
+        "0,0,0.8,,ACDE,true,\n"
+        "1,1,0.75,81.5,FGHI,False,\n"
+    )
+
+    rows = boltz._read_summary_csv(summary_csv)
+
+    assert rows == [
+        {"gpu_id": 0, "run": 0, "iptm": 0.8, "plddt": None, "sequence": "ACDE", "high_iptm": True, "note": None},
+        {"gpu_id": 1, "run": 1, "iptm": 0.75, "plddt": 81.5, "sequence": "FGHI", "high_iptm": False, "note": None},
+    ]
+    assert [type(value) for value in rows[0].values()] == [int, int, float, type(None), str, bool, type(None)]
+
+
+def test_read_run_summary_rejects_other_paths(make_tools):
+    """Test that the summary resource only serves completed runs under results_boltz."""
+    tools = make_tools()
+    with pytest.raises(ValueError):
+        tools.read_run_summary("../boltz_ph")
+    with pytest.raises(FileNotFoundError):
+        tools.read_run_summary("missing__0123456789abcdef")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Tests for the Chai design tools that need no GPU."""
+
+import asyncio
+import json
+
+import pytest
+
+from protein_hunter_mcp.chai import _RE_STEP, ChaiTools, _auto_diffusion_params, _collect_run, _target_tokens
+
+# Stand-in for Protein-Hunter/chai_ph/design.py: logs each call, prints step lines,
+# optionally sleeps FAKE_CHAI_SLEEP seconds, then writes one run directory per trial.
+FAKE_DESIGN_PY = '''\
+import argparse, json, os, time
+from pathlib import Path
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--jobname")
+parser.add_argument("--n_trials", type=int)
+parser.add_argument("--n_cycles", type=int)
+args, _ = parser.parse_known_args()
+
+with open("calls.log", "a") as log:
+    log.write(args.jobname + "\\n")
+for trial in range(args.n_trials):
+    for step in range(args.n_cycles):
+        print(f"run_{trial} | Step {step}", flush=True)
+time.sleep(float(os.environ.get("FAKE_CHAI_SLEEP", "0")))
+
+for trial in range(args.n_trials):
+    run_dir = Path("results_chai") / args.jobname / f"run_{trial}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    (run_dir / f"cycle_{args.n_cycles}.pdb").write_text("")
+    (run_dir / "metrics.json").write_text(json.dumps({"iptm": 0.7}))
+'''
+
+
+@pytest.fixture
+def make_tools(fake_checkout):
+    """Build ChaiTools running FAKE_DESIGN_PY."""
+    return lambda: fake_checkout(ChaiTools(), "chai_ph", FAKE_DESIGN_PY)
+
+
+def _design(tools, jobname="job", **kwargs):
+    return tools._run_chai_design(
+        jobname=jobname, length=10, percent_X=0, seq="", target_seq="ACDE",
+        n_trials=1, n_cycles=2, **kwargs,
+    )
+
+
+def _calls(tools) -> list[str]:
+    calls_log = tools._ph_dir / "calls.log"
+    return calls_log.read_text().split() if calls_log.exists() else []
+
+
+def test_collect_run_picks_highest_cycle(tmp_path):
+    """Test that a run's final PDB is the highest cycle number, not the last name."""
+    run_dir = tmp_path / "job" / "run_0"
+    run_dir.mkdir(parents=True)
+    for cycle in (2, 9, 10):
+        (run_dir / f"cycle_{cycle}.pdb").write_text("")
+    (run_dir / "metrics.json").write_text(json.dumps({"iptm": 0.8, "plddt": [50, 70]}))
+    (run_dir / "sequence.txt").write_text("ACDE\n")
+
+    run_info = _collect_run(run_dir)
+
+    assert run_info["pdb_file"].endswith("cycle_10.pdb")
+    assert run_info["metrics_summary"] == {"iptm": 0.8, "final_plddt": 70}
+    assert run_info["metrics_uri"] == "chai://results/job/run_0/metrics"
+    assert run_info["sequence"] == "ACDE"
+
+
+def test_target_tokens():
+    """Test that proteins count residues and SMILES targets count heavy atoms."""
+    assert _target_tokens("ACDEFGHIKL") == 10
+    assert _target_tokens("ACDE:FGHI") == 8
+    # Ethanol and chloroethylammonium: bonds, charges and brackets are not atoms
+    assert _target_tokens("CCO") == 3
+    assert _target_tokens("C[C@@H](Cl)[NH3+]") == 4
+    assert _target_tokens("c1ccccc1O") == 7
+
+
+def test_step_regex():
+    """Test that step lines are found in a block of design.py output."""
+    block = b"loading\nrun_0 | Step 3\nrun_2 |Step  14 | iptm 0.5\n"
+    assert _RE_STEP.findall(block) == [(b"0", b"3"), (b"2", b"14")]
+
+
+async def test_cache_hit_miss_and_force(make_tools):
+    """Test that a repeated job returns stored results until forced or its output is replaced."""
+    tools = make_tools()
+
+    first = await _design(tools)
+    assert first["status"] == "completed"
+    assert first["cached"] is False
+    assert first["results"][0]["pdb_file"].endswith("cycle_2.pdb")
+
+    second = await _design(tools)
+    assert second["cached"] is True
+    assert second["results"] == first["results"]
+    assert (await _design(tools, dry_run=True))["cached"] is True
+
+    forced = await _design(tools, force=True)
+    assert forced["cached"] is False
+
+    # A different job writing to the same directory makes the stored result stale
+    await _design(tools, n_diff_steps=7)
+    assert (await _design(tools))["cached"] is False
+    assert _calls(tools) == ["job"] * 4
+
+
+async def test_identical_jobs_share_one_run(make_tools, monkeypatch):
+    """Test that concurrent identical jobs run once and cancelling one caller keeps it running."""
+    monkeypatch.setenv("FAKE_CHAI_SLEEP", "0.5")
+    tools = make_tools()
+
+    first = asyncio.create_task(_design(tools))
+    second = asyncio.create_task(_design(tools))
+    third = asyncio.create_task(_design(tools))
+    await asyncio.sleep(0.1)
+    assert len(tools._inflight) == 1
+    first.cancel()
+
+    results = await asyncio.wait_for(asyncio.gather(second, third), 30)
+    assert [result["status"] for result in results] == ["completed", "completed"]
+    assert first.cancelled()
+    assert _calls(tools) == ["job"]
+    assert not tools._inflight and not tools._inflight_waiters
+
+
+async def test_cancelling_every_caller_stops_the_job(make_tools, monkeypatch):
+    """Test that the design is stopped once no caller is waiting for it."""
+    monkeypatch.setenv("FAKE_CHAI_SLEEP", "2")
+    tools = make_tools()
+
+    callers = [asyncio.create_task(_design(tools)) for _ in range(2)]
+    while not _calls(tools):
+        await asyncio.sleep(0.05)
+    task = tools._inflight[next(iter(tools._inflight))]
+    for caller in callers:
+        caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(asyncio.gather(*callers), 10)
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(task, 10)
+    await asyncio.sleep(2.5)
+    assert not (tools._results_chai / "job").exists(), "the design process should have been killed"
+
+
+def test_auto_diffusion_params():
+    """Test the length-scaled defaults at the edges of their clamps."""
+    assert _auto_diffusion_params(15) == (100, 3)
+    assert _auto_diffusion_params(120) == (170, 3)
+    assert _auto_diffusion_params(250) == (300, 3)
+    assert _auto_diffusion_params(500) == (300, 3)
+    assert _auto_diffusion_params(501) == (300, 2)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Tests for the persistent design worker protocol."""
+
+import asyncio
+
+from protein_hunter_mcp.design_worker import DesignWorker, WorkerPool
+
+
+async def _run_job(tmp_path, env, script_body, argv=()):
+    script = tmp_path / "design.py"
+    script.write_text(script_body)
+    worker = DesignWorker(script, tmp_path, env=env)
+    output = []
+
+    async def on_output(block):
+        output.append(block)
+
+    try:
+        assert await asyncio.wait_for(worker.start(), 30)
+        returncode, stderr = await asyncio.wait_for(worker.submit(list(argv), on_output), 10)
+    finally:
+        await worker.close()
+    return returncode, stderr, b"".join(output)
+
+
+async def test_worker_runs_job(tmp_path, worker_env):
+    """Test that a job's stdout, stderr and exit code come back through the worker."""
+    returncode, stderr, stdout = await _run_job(
+        tmp_path,
+        worker_env,
+        "import sys\n"
+        "print('--- Run 0, Cycle 1 ---', sys.argv[1:])\n"
+        "print('oops', file=sys.stderr)\n"
+        "sys.exit(3)\n",
+        ["--num_designs", "1"],
+    )
+
+    assert returncode == 3
+    assert b"--- Run 0, Cycle 1 --- ['--num_designs', '1']" in stdout
+    assert "oops" in stderr
+
+
+async def test_worker_marker_after_unterminated_stderr(tmp_path, worker_env):
+    """Test that a job whose stderr ends without a newline still completes."""
+    returncode, stderr, _ = await _run_job(
+        tmp_path,
+        worker_env,
+        "import sys\n"
+        "sys.stderr.write('progress 100%\\r')\n"
+        "sys.stdout.write('no newline either')\n",
+    )
+
+    assert returncode == 0
+    assert "progress 100%" in stderr
+    assert "@@protein_hunter_worker" not in stderr
+
+
+async def test_pool_remembers_failed_start(tmp_path, monkeypatch, worker_env):
+    """Test that a GPU whose worker failed to start is not retried."""
+    script = tmp_path / "design.py"
+    script.write_text("")
+    pool = WorkerPool(script, tmp_path, preload=("no_such_module_for_tests",), env=worker_env)
+    starts = []
+    original_start = DesignWorker.start
+
+    async def counting_start(self):
+        starts.append(self.gpu_id)
+        return await original_start(self)
+
+    monkeypatch.setattr(DesignWorker, "start", counting_start)
+
+    assert await pool.get(0) is None
+    assert await pool.get(0) is None
+    assert starts == [0]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Tests for the post-installation script's download steps (no network needed)."""
+
+import io
+import json
+
+import pytest
+
+import postinstall
+
+
+class FakeSession:
+    """Stands in for requests.Session: only used as a context manager here."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class FakeResponse:
+    """Stands in for a streamed requests.Response."""
+
+    def __init__(self, status_code, body=b""):
+        self.status_code = status_code
+        self.headers = {"Content-Length": str(len(body))}
+        self.raw = io.BytesIO(body)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise IOError(f"HTTP {self.status_code}")
+
+
+class RangeSession:
+    """Serves one file, honouring Range requests unless ignore_range is set."""
+
+    def __init__(self, body, ignore_range=False):
+        self.body = body
+        self.ignore_range = ignore_range
+        self.ranges = []
+
+    def get(self, url, stream, headers):
+        assert headers["Accept-Encoding"] == "identity"
+        self.ranges.append(headers.get("Range"))
+        if "Range" not in headers or self.ignore_range:
+            return FakeResponse(200, self.body)
+        start = int(headers["Range"].removeprefix("bytes=").rstrip("-"))
+        if start >= len(self.body):
+            return FakeResponse(416)
+        return FakeResponse(206, self.body[start:])
+
+
+@pytest.mark.parametrize(
+    "partial, ignore_range, expected_ranges",
+    [
+        (b"0123", False, ["bytes=4-"]),
+        (b"0123", True, ["bytes=4-"]),
+        (b"stale partial file that is too long", False, ["bytes=35-", None]),
+    ],
+    ids=["resumed", "range-ignored", "range-not-satisfiable"],
+)
+def test_download_resumes_partial_file(tmp_path, partial, ignore_range, expected_ranges):
+    """Test that a .part file is resumed, overwritten or restarted as the server answers."""
+    output_path = tmp_path / "weights.pt"
+    (tmp_path / "weights.pt.part").write_bytes(partial)
+    session = RangeSession(b"0123456789", ignore_range=ignore_range)
+
+    postinstall.download_file("https://example.org/weights.pt", output_path, session)
+
+    assert output_path.read_bytes() == b"0123456789"
+    assert not (tmp_path / "weights.pt.part").exists()
+    assert session.ranges == expected_ranges
+
+
+def test_download_keeps_truncated_body_as_part(tmp_path):
+    """Test that a body shorter than its Content-Length is not renamed into place."""
+    output_path = tmp_path / "weights.pt"
+    session = RangeSession(b"0123456789")
+    truncated = FakeResponse(200, b"0123456789")
+    truncated.raw = io.BytesIO(b"01234")
+    session.get = lambda url, stream, headers: truncated
+
+    with pytest.raises(IOError, match="Incomplete download"):
+        postinstall.download_file("https://example.org/weights.pt", output_path, session)
+
+    assert not output_path.exists()
+    assert (tmp_path / "weights.pt.part").read_bytes() == b"01234"
+
+
+def _fake_download(url, output_path, session):
+    output_path.write_bytes(url.encode())
+    return output_path.stat().st_size
+
+
+def test_ligandmpnn_rehashes_only_changed_files(tmp_path, monkeypatch):
+    """Test that verified weights are skipped by size/mtime and changed ones re-hashed."""
+    monkeypatch.chdir(tmp_path)
+    params = tmp_path / "Protein-Hunter" / "LigandMPNN" / "model_params"
+    params.mkdir(parents=True)
+    monkeypatch.setattr(postinstall, "create_download_session", FakeSession)
+    monkeypatch.setattr(postinstall, "download_file", _fake_download)
+    hashed = []
+    real_sha256_file = postinstall.sha256_file
+    monkeypatch.setattr(postinstall, "sha256_file", lambda path: hashed.append(path.name) or real_sha256_file(path))
+
+    postinstall.setup_ligandmpnn()
+    checksums = json.loads((params / "sha256.json").read_text())
+    assert len(checksums) == 15
+    assert {"sha256", "size", "mtime_ns"} <= checksums["proteinmpnn_v_48_002.pt"].keys()
+
+    hashed.clear()
+    postinstall.setup_ligandmpnn()
+    assert hashed == []
+
+    # A corrupted file no longer matches its record: it is re-hashed and re-downloaded
+    corrupted = params / "proteinmpnn_v_48_002.pt"
+    corrupted.write_bytes(b"garbage that is longer than the url")
+    postinstall.setup_ligandmpnn()
+    assert hashed.count("proteinmpnn_v_48_002.pt") == 2
+    assert corrupted.read_bytes().startswith(b"https://")
+
+
+def test_ligandmpnn_skips_digest_of_unchecked_download(tmp_path, monkeypatch):
+    """Test that a download without Content-Length is kept but not recorded as verified."""
+    monkeypatch.chdir(tmp_path)
+    params = tmp_path / "Protein-Hunter" / "LigandMPNN" / "model_params"
+    params.mkdir(parents=True)
+    monkeypatch.setattr(postinstall, "create_download_session", FakeSession)
+
+    def download_without_length(url, output_path, session):
+        if "solublempnn" not in url:
+            return _fake_download(url, output_path, session)
+        output_path.write_bytes(b"unchecked")
+        return None
+
+    monkeypatch.setattr(postinstall, "download_file", download_without_length)
+
+    postinstall.setup_ligandmpnn()
+
+    checksums = json.loads((params / "sha256.json").read_text())
+    assert len(checksums) == 11
+    assert "solublempnn_v_48_002.pt" not in checksums
+    assert (params / "solublempnn_v_48_002.pt").read_bytes() == b"unchecked"
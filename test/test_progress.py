@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Tests for the helpers that follow design process output."""
+
+import asyncio
+
+from protein_hunter_mcp import progress
+from protein_hunter_mcp.progress import iter_line_blocks
+
+
+async def _blocks(data: bytes, chunk_size: int) -> list[bytes]:
+    stream = asyncio.StreamReader()
+    stream.feed_data(data)
+    stream.feed_eof()
+    return [block async for block in iter_line_blocks(stream, chunk_size)]
+
+
+async def test_blocks_end_on_line_boundaries():
+    """Test that a line split across reads is held back until it is complete."""
+    blocks = await _blocks(b"--- Run 0, Cycle 1 ---\n--- Run 0, Cycle 2 ---\ntail", chunk_size=10)
+
+    assert b"".join(blocks) == b"--- Run 0, Cycle 1 ---\n--- Run 0, Cycle 2 ---\ntail"
+    assert all(block.endswith(b"\n") for block in blocks[:-1])
+    assert blocks[-1] == b"tail"
+
+
+async def test_carriage_returns_end_lines():
+    """Test that a progress bar redrawn with "\\r" is passed on as it goes."""
+    bar = b"".join(b"%3d%%\r" % percent for percent in range(0, 101, 10))
+
+    blocks = await _blocks(bar, chunk_size=8)
+
+    assert len(blocks) > 1
+    assert all(block.endswith(b"\r") for block in blocks)
+    assert b"".join(blocks) == bar
+
+
+async def test_long_line_is_passed_on_unfinished(monkeypatch):
+    """Test that a line without any break is not buffered past PARTIAL_MAX_BYTES."""
+    monkeypatch.setattr(progress, "PARTIAL_MAX_BYTES", 32)
+
+    blocks = await _blocks(b"x" * 100, chunk_size=8)
+
+    assert max(len(block) for block in blocks) == 32
+    assert b"".join(blocks) == b"x" * 100
@@ -1,61 +1,99 @@
 #!/usr/bin/env python3
 """Tests for Protein Hunter MCP Server."""
 
+import asyncio
+from pathlib import Path
+
 import pytest
-from protein_hunter_mcp.server import ProteinHunterMCP
+import pytest_asyncio
+from fastmcp import Client
+from protein_hunter_mcp.example_sequences import get_example
+from protein_hunter_mcp.server import EXAMPLE_RESOURCES, ProteinHunterMCP
 
 
-@pytest.fixture
-def server():
-    """Create a test server instance."""
-    return ProteinHunterMCP(transport_mode="stdio")
+@pytest.fixture(scope="session")
+def make_server():
+    """Build servers on demand, reusing one instance per (transport mode, output dir)."""
+    cache = {}
 
+    def _make(mode="stdio", out=None):
+        key = (mode, out)
+        if key not in cache:
+            cache[key] = ProteinHunterMCP(transport_mode=mode, output_dir=out)
+        return cache[key]
 
-@pytest.mark.asyncio
-async def test_hello_world_default(server):
-    """Test hello_world with default parameters."""
-    result = await server.hello_world()
-    
-    assert "message" in result
-    assert "Hello, World!" in result["message"]
-    assert "version" in result
-    assert "transport" in result
-    assert result["transport"] == "stdio"
-    assert "output_dir" in result
-
-
-@pytest.mark.asyncio
-async def test_hello_world_custom_name(server):
-    """Test hello_world with custom name."""
-    result = await server.hello_world(name="Protein Hunter")
-    
-    assert "message" in result
-    assert "Hello, Protein Hunter!" in result["message"]
-    assert "version" in result
-
-
-@pytest.mark.asyncio
-async def test_server_initialization():
-    """Test server initialization with different modes."""
-    # Test stdio mode
-    server_stdio = ProteinHunterMCP(transport_mode="stdio")
-    assert server_stdio.transport_mode == "stdio"
-    assert server_stdio.prefix == "ph_"
-    
-    # Test http mode
-    server_http = ProteinHunterMCP(transport_mode="streamable-http")
-    assert server_http.transport_mode == "streamable-http"
-    
-    # Test sse mode
-    server_sse = ProteinHunterMCP(transport_mode="sse")
-    assert server_sse.transport_mode == "sse"
+    return _make
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warmup(make_server):
+    """Pay the first server construction up front so --durations shows per-test cost."""
+    make_server("stdio")
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def server(make_server):
+    """Create one test server instance shared by the module's tests (none mutate it)."""
+    return make_server("stdio")
+
+
+# URIs of the example sequences every server serves, Protein-Hunter installed or not
+EXPECTED_URIS = frozenset(uri for uri, _, _, _ in EXAMPLE_RESOURCES)
+
+
+async def test_example_resources(server):
+    """Test that every example sequence is listed and served, read concurrently."""
+    async with Client(server) as client:
+        listed = {str(resource.uri) for resource in await client.list_resources()}
+        contents = await asyncio.gather(*(client.read_resource(uri) for uri in EXPECTED_URIS))
 
+    assert EXPECTED_URIS <= listed
+    examples = {uri: example for uri, _, example, _ in EXAMPLE_RESOURCES}
+    for uri, content in zip(EXPECTED_URIS, contents):
+        assert content[0].text == get_example(examples[uri])
 
-def test_server_output_directory(tmp_path):
-    """Test custom output directory."""
-    custom_dir = tmp_path / "custom_output"
+
+async def test_result_resource_templates(server):
+    """Test that the URIs linked from design results are registered as templates."""
+    async with Client(server) as client:
+        templates = {template.uri_template for template in await client.list_resource_templates()}
+
+    assert {"boltz://results/{name}/summary", "chai://results/{jobname}/{run}/metrics"} <= templates
+
+
+@pytest.mark.parametrize("mode", ["stdio", "streamable-http", "sse"])
+def test_server_initialization(mode):
+    """Test server initialization with each transport mode."""
+    s = ProteinHunterMCP(transport_mode=mode)
+    assert s.transport_mode == mode
+    assert s.prefix == "ph_"
+
+
+def test_server_output_directory(monkeypatch, tmp_path_factory):
+    """Test that a custom output directory is used and created, without touching the disk."""
+    custom_dir = tmp_path_factory.getbasetemp() / "never_created"
+    calls = []
+    monkeypatch.setattr(Path, "mkdir", lambda self, *args, **kwargs: calls.append(self))
     server = ProteinHunterMCP(transport_mode="stdio", output_dir=str(custom_dir))
+
+    assert server.output_dir == custom_dir
+    assert custom_dir in calls, "output_dir.mkdir should have been called"
+    assert not custom_dir.exists()
+
+
+@pytest.mark.slow
+def test_server_output_directory_on_disk(make_server, tmp_path_factory):
+    """Test that a custom output directory is really created on disk."""
+    custom_dir = tmp_path_factory.mktemp("custom_output") / "sub"
+    server = make_server("stdio", str(custom_dir))
     
     assert server.output_dir == custom_dir
     assert server.output_dir.exists()
 
+
+def test_legacy_example_names():
+    """Test that the old EXAMPLE_* constants still import from the server module."""
+    from protein_hunter_mcp.server import EXAMPLE_LIGAND_SAM, EXAMPLE_PDL1_SEQUENCE
+
+    assert EXAMPLE_PDL1_SEQUENCE == get_example("pdl1")
+    assert EXAMPLE_LIGAND_SAM == get_example("ligand_sam")
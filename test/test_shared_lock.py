@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Tests for the per-GPU design slots."""
+
+import asyncio
+
+import pytest
+
+from protein_hunter_mcp import shared_lock
+from protein_hunter_mcp.boltz import BoltzTools
+from protein_hunter_mcp.shared_lock import design_slot, set_max_concurrent_per_gpu
+
+
+@pytest.fixture(autouse=True)
+def reset_slots():
+    """Start and finish every test with the default limit and no semaphores."""
+    set_max_concurrent_per_gpu(1)
+    yield
+    set_max_concurrent_per_gpu(1)
+
+
+async def test_reconfiguring_keeps_held_slot():
+    """Test that a held GPU keeps its semaphore (and limit) until it is released."""
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def hold():
+        async with design_slot(0):
+            entered.set()
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await entered.wait()
+    set_max_concurrent_per_gpu(2)
+
+    async def second_design():
+        async with design_slot(0, wait_interval=0.01):
+            pass
+
+    second = asyncio.create_task(second_design())
+    await asyncio.sleep(0.05)
+    assert not second.done(), "a held GPU must not get a fresh semaphore"
+
+    release.set()
+    await holder
+    await asyncio.wait_for(second, 1)
+    assert shared_lock._design_slots[0][0] == 1
+
+
+async def test_idle_slot_picks_up_new_limit():
+    """Test that an idle GPU uses the new limit."""
+    async with design_slot(0):
+        pass
+    set_max_concurrent_per_gpu(2)
+
+    async def two_designs():
+        async with design_slot(0):
+            async with design_slot(0):
+                pass
+
+    await asyncio.wait_for(two_designs(), 1)
+    assert shared_lock._design_slots[0][0] == 2
+
+
+def test_boltz_tools_leave_limit_alone():
+    """Test that constructing BoltzTools doesn't reset the configured limit."""
+    set_max_concurrent_per_gpu(3)
+    BoltzTools()
+    assert shared_lock._max_concurrent_per_gpu == 3